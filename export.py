@@ -0,0 +1,209 @@
+# export.py - decode once, write many formats
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from main import M32, MixerScene
+from telemetry import Telemetry
+
+Encoder = Callable[[MixerScene, str], None]
+
+def _encode_json(scene: MixerScene, file_path: str) -> None:
+    scene.save_json(file_path)
+
+# encoder name -> writer; names match the decoder/encoder names used by the GUI.
+# Encoders write through writers.open_atomic, so outputs are replaced atomically.
+ENCODERS: Dict[str, Encoder] = {
+    'json': _encode_json,
+    'm32': M32.encode,
+}
+
+EXTENSIONS: Dict[str, str] = {
+    'json': '.json',
+    'm32': '.scn',
+}
+
+@dataclass
+class ExportResult:
+    source: str
+    outputs: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+def decode_bytes(file_path: str, data: bytes) -> MixerScene:
+    """Decode the contents of a source file, picking the decoder from its extension."""
+    if file_path.lower().endswith('.json'):
+        return MixerScene.from_dict(json.loads(data.decode('utf-8')))
+    return M32.decode_bytes(data)
+
+def decode_file(file_path: str) -> MixerScene:
+    """Decode a source file, picking the decoder from its extension."""
+    with open(file_path, 'rb') as f:
+        return decode_bytes(file_path, f.read())
+
+def _prepare(scene: MixerScene) -> MixerScene:
+    # Not a copy: the encoders share the caller's scene between threads. They
+    # only read it, which is safe once nothing is left to parse on access
+    # (see M32.decode(..., lazy=True)).
+    scene.input_channels.materialize()
+    return scene
+
+def export_scene(scene: MixerScene, targets: Dict[str, str], *, executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, str]:
+    """Write one decoded scene to several formats concurrently.
+
+    targets maps an encoder name from ENCODERS to a destination path. Returns
+    the same mapping once every file has been written. The encoders read the
+    scene itself rather than a copy, so it must not be modified until this
+    returns.
+    """
+    for enc in targets:
+        if enc not in ENCODERS:
+            raise ValueError(f'Unknown encoder: {enc!r}')
+    scene = _prepare(scene)
+    if executor is None and len(targets) <= 1:
+        for enc, path in targets.items():
+            ENCODERS[enc](scene, path)
+        return dict(targets)
+
+    own_executor = executor is None
+    pool = executor if executor is not None else ThreadPoolExecutor(max_workers=len(targets))
+    try:
+        futures = [pool.submit(ENCODERS[enc], scene, path) for enc, path in targets.items()]
+        for fut in futures:
+            fut.result()
+    finally:
+        if own_executor:
+            pool.shutdown()
+    return dict(targets)
+
+def _decode_timed(file_path: str, telemetry: Optional[Telemetry]) -> MixerScene:
+    if telemetry is None:
+        return decode_file(file_path)
+    with telemetry.stage('decode', file_path) as rec:
+        # same read and decode as decode_file; lines are counted from those bytes
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        rec.lines = data.count(b'\n')
+        return decode_bytes(file_path, data)
+
+def _encode_timed(enc: str, scene: MixerScene, file_path: str, source: str, telemetry: Optional[Telemetry]) -> None:
+    if telemetry is None:
+        ENCODERS[enc](scene, file_path)
+        return
+    with telemetry.stage('encode.' + enc, source):
+        ENCODERS[enc](scene, file_path)
+
+def export_batch(
+    sources: Iterable[str],
+    out_dir: str,
+    formats: Sequence[str] = ('json', 'm32'),
+    *,
+    max_workers: Optional[int] = None,
+    telemetry: Optional[Telemetry] = None,
+) -> List[ExportResult]:
+    """Decode each source once and write it to every format in out_dir.
+
+    Output files are named after the source file with the format's extension;
+    a source whose outputs would overwrite those of an earlier source (e.g.
+    a/x.scn and b/x.scn, or x.scn and x.json) is skipped with an error.
+    Errors are reported per source in ExportResult.error instead of aborting
+    the whole batch. Results are returned in the order of sources. Pass a
+    Telemetry to record per-file 'decode' and 'encode.<format>' stages.
+    """
+    for enc in formats:
+        if enc not in ENCODERS:
+            raise ValueError(f'Unknown encoder: {enc!r}')
+    os.makedirs(out_dir, exist_ok=True)
+
+    results: List[ExportResult] = [ExportResult(source=src) for src in sources]
+    # claim output paths up front so two sources never write the same file
+    claimed: Dict[str, str] = {}
+    planned: Dict[int, Dict[str, str]] = {}
+    for i, res in enumerate(results):
+        stem = os.path.splitext(os.path.basename(res.source))[0]
+        dsts = {enc: os.path.join(out_dir, stem + EXTENSIONS[enc]) for enc in formats}
+        taken = [claimed[os.path.normcase(d)] for d in dsts.values() if os.path.normcase(d) in claimed]
+        if taken:
+            res.error = f'output name collides with {taken[0]}'
+            continue
+        for d in dsts.values():
+            claimed[os.path.normcase(d)] = res.source
+        planned[i] = dsts
+
+    # Decodes are submitted only while fewer than `workers` sources are between
+    # decode and their last encode, so encodes interleave with decodes and at
+    # most that many decoded scenes are held at once.
+    workers = max_workers if max_workers is not None else min(32, (os.cpu_count() or 1) + 4)
+    queue = iter(planned)
+    in_flight = 0
+    tasks: Dict['Future[Any]', Tuple[int, Optional[str]]] = {}
+    remaining: Dict[int, int] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def fill() -> None:
+            nonlocal in_flight
+            while in_flight < workers:
+                i = next(queue, None)
+                if i is None:
+                    return
+                tasks[pool.submit(_decode_timed, results[i].source, telemetry)] = (i, None)
+                in_flight += 1
+
+        fill()
+        while tasks:
+            done, _ = wait(tasks, return_when=FIRST_COMPLETED)
+            for task in done:
+                i, target = tasks.pop(task)
+                res = results[i]
+                if target is None:
+                    try:
+                        scene = _prepare(task.result())
+                    except Exception as e:
+                        res.error = f'decode failed: {e}'
+                        in_flight -= 1
+                        continue
+                    remaining[i] = len(planned[i])
+                    for fmt, dst in planned[i].items():
+                        tasks[pool.submit(_encode_timed, fmt, scene, dst, res.source, telemetry)] = (i, fmt)
+                        res.outputs[fmt] = dst
+                    if not planned[i]:
+                        in_flight -= 1
+                    # only the encode tasks should keep the scene alive
+                    del scene
+                    continue
+                try:
+                    task.result()
+                except Exception as e:
+                    del res.outputs[target]
+                    if res.error is None:
+                        res.error = f'encode failed: {e}'
+                remaining[i] -= 1
+                if not remaining[i]:
+                    in_flight -= 1
+            fill()
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert scene files to several formats in one pass.')
+    parser.add_argument('out_dir')
+    parser.add_argument('sources', nargs='+')
+    parser.add_argument('-f', '--format', dest='formats', action='append', choices=sorted(ENCODERS))
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--telemetry', metavar='PATH', help='write a telemetry report (JSON, or Prometheus text for *.prom)')
+    args = parser.parse_args()
+
+    telemetry = Telemetry(output=args.telemetry) if args.telemetry else None
+    failed = 0
+    results = export_batch(args.sources, args.out_dir, args.formats or ('json', 'm32'), max_workers=args.workers, telemetry=telemetry)
+    if telemetry is not None:
+        telemetry.close()
+    for res in results:
+        if res.error:
+            failed += 1
+            print(f'{res.source}: {res.error}')
+        else:
+            print(f'{res.source} -> {", ".join(res.outputs.values())}')
+    raise SystemExit(1 if failed else 0)
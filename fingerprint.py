@@ -0,0 +1,240 @@
+# fingerprint.py - canonical scene fingerprints and near-duplicate detection
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import hashlib
+from itertools import repeat
+import math
+import random
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from main import InputChannel, MixerScene
+
+_MASK64 = (1 << 64) - 1
+_PRIME = (1 << 61) - 1  # Mersenne prime for the MinHash permutations
+
+@dataclass(frozen=True)
+class Quantization:
+    """Step sizes used to round parameters before hashing.
+
+    Values that round to the same step hash identically, so scenes that differ
+    only by e.g. fader rounding get the same fingerprint.
+    """
+    level_db: float = 0.5      # gain, fader, EQ gain and send levels
+    frequency_octave: float = 1 / 12  # EQ and low-cut frequencies, on a log scale
+    width: float = 0.1
+    pan: float = 0.02
+
+DEFAULT_QUANTIZATION = Quantization()
+
+def _q(value: float, step: float) -> int:
+    return int(round(value / step))
+
+def _q_freq(hz: float, q: Quantization) -> int:
+    return int(round(math.log2(max(hz, 1.0)) / q.frequency_octave))
+
+def channel_key(ch: InputChannel, q: Quantization = DEFAULT_QUANTIZATION, *, names: bool = True) -> Tuple[object, ...]:
+    """The quantized parameters of a channel, in a fixed order."""
+    bands = tuple(
+        (b.type.value, _q_freq(b.frequency, q), _q(b.gain, q.level_db), _q(b.width, q.width))
+        for b in ch.equalizer.bands
+    )
+    sends = tuple(
+        (s.is_muted, s.type.value, _q(s.level, q.level_db))
+        for s in ch.bus_sends.sends
+    )
+    return (
+        ch.name if names else '',
+        _q(ch.gain, q.level_db),
+        ch.low_cut_filter,
+        _q_freq(ch.low_cut_filter_frequency, q),
+        ch.is_muted,
+        ch.equalizer_enabled,
+        bands,
+        _q(ch.pan, q.pan),
+        sends,
+        _q(ch.fader, q.level_db),
+    )
+
+def channel_fingerprint(ch: InputChannel, q: Quantization = DEFAULT_QUANTIZATION, *, names: bool = True) -> int:
+    """64-bit hash of a channel's quantized parameters."""
+    digest = hashlib.blake2b(repr(channel_key(ch, q, names=names)).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+@dataclass(frozen=True)
+class SceneFingerprint:
+    """Per-channel fingerprints plus a digest over all of them.
+
+    The scene name is not part of the fingerprint, so copies saved under
+    different names match.
+    """
+    digest: str
+    channels: Tuple[int, ...]
+
+    def similarity(self, other: 'SceneFingerprint') -> float:
+        """Fraction of channel positions with identical fingerprints."""
+        n = max(len(self.channels), len(other.channels))
+        if n == 0:
+            return 1.0
+        return sum(a == b for a, b in zip(self.channels, other.channels)) / n
+
+def fingerprint_scene(scene: MixerScene, q: Quantization = DEFAULT_QUANTIZATION, *, names: bool = True) -> SceneFingerprint:
+    channels = tuple(channel_fingerprint(ch, q, names=names) for ch in scene.input_channels.channels)
+    h = hashlib.blake2b(digest_size=16)
+    for fp in channels:
+        h.update(fp.to_bytes(8, 'big'))
+    return SceneFingerprint(digest=h.hexdigest(), channels=channels)
+
+class SimilarityIndex:
+    """Locality-sensitive index of scene fingerprints.
+
+    Each scene is treated as the set of (position, channel fingerprint) pairs and
+    summarised with a MinHash signature of num_perm values, split into bands.
+    Scenes sharing any band become candidates, which are then scored with
+    SceneFingerprint.similarity. Exact duplicates (same digest) are grouped
+    directly and only one representative per digest enters the LSH tables.
+    """
+    def __init__(self, num_perm: int = 32, bands: int = 8, seed: int = 1) -> None:
+        if num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._rows = num_perm // bands
+        self._bands = bands
+        self._by_digest: Dict[str, List[Hashable]] = {}
+        self._fingerprints: Dict[str, SceneFingerprint] = {}
+        self._tables: List[Dict[Tuple[int, ...], List[str]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self._by_digest.values())
+
+    def _signature(self, fp: SceneFingerprint) -> List[int]:
+        features = [(c ^ (i * 0x9E3779B97F4A7C15)) & _MASK64 for i, c in enumerate(fp.channels)]
+        if not features:
+            return [0] * len(self._perms)
+        return [min((a * x + b) % _PRIME for x in features) for a, b in self._perms]
+
+    def _band_keys(self, sig: List[int]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        r = self._rows
+        for band in range(self._bands):
+            yield band, tuple(sig[band * r:(band + 1) * r])
+
+    def add(self, key: Hashable, fp: SceneFingerprint) -> None:
+        keys = self._by_digest.setdefault(fp.digest, [])
+        keys.append(key)
+        if len(keys) > 1:
+            return
+        self._fingerprints[fp.digest] = fp
+        for band, bkey in self._band_keys(self._signature(fp)):
+            self._tables[band].setdefault(bkey, []).append(fp.digest)
+
+    def _candidates(self, fp: SceneFingerprint) -> Iterable[str]:
+        seen = set()
+        for band, bkey in self._band_keys(self._signature(fp)):
+            for digest in self._tables[band].get(bkey, ()):
+                if digest not in seen:
+                    seen.add(digest)
+                    yield digest
+
+    def query(self, fp: SceneFingerprint, threshold: float = 0.9) -> List[Tuple[Hashable, float]]:
+        """Return (key, similarity) for indexed scenes at least threshold similar, best first."""
+        found: List[Tuple[Hashable, float]] = []
+        for digest in self._candidates(fp):
+            sim = 1.0 if digest == fp.digest else fp.similarity(self._fingerprints[digest])
+            if sim >= threshold:
+                found.extend((key, sim) for key in self._by_digest[digest])
+        found.sort(key=lambda item: -item[1])
+        return found
+
+    def duplicates(self) -> List[List[Hashable]]:
+        """Groups of keys whose fingerprints are identical."""
+        return [list(keys) for keys in self._by_digest.values() if len(keys) > 1]
+
+    def clusters(self, threshold: float = 0.9) -> List[List[Hashable]]:
+        """Group near-duplicate scenes (similarity >= threshold); singletons are omitted."""
+        parent: Dict[str, str] = {d: d for d in self._fingerprints}
+
+        def find(d: str) -> str:
+            while parent[d] != d:
+                parent[d] = parent[parent[d]]
+                d = parent[d]
+            return d
+
+        for table in self._tables:
+            for digests in table.values():
+                if len(digests) < 2:
+                    continue
+                # compare each scene with one leader per group formed in this bucket
+                # rather than with every other scene, so large buckets stay linear
+                leaders: List[str] = []
+                for d in digests:
+                    fd = self._fingerprints[d]
+                    for leader in leaders:
+                        if find(d) == find(leader) or fd.similarity(self._fingerprints[leader]) >= threshold:
+                            parent[find(d)] = find(leader)
+                            break
+                    else:
+                        leaders.append(d)
+
+        groups: Dict[str, List[Hashable]] = {}
+        for digest, keys in self._by_digest.items():
+            groups.setdefault(find(digest), []).extend(keys)
+        return [keys for keys in groups.values() if len(keys) > 1]
+
+def _fingerprint_file(file_path: str, q: Quantization) -> Tuple[Optional[SceneFingerprint], Optional[str]]:
+    from export import decode_file
+
+    try:
+        return fingerprint_scene(decode_file(file_path), q), None
+    except Exception as e:
+        return None, str(e)
+
+def _add_results(
+    index: SimilarityIndex,
+    paths: Sequence[str],
+    results: Iterable[Tuple[Optional[SceneFingerprint], Optional[str]]],
+    errors: Optional[Dict[str, str]],
+) -> SimilarityIndex:
+    for path, (fp, error) in zip(paths, results):
+        if fp is not None:
+            index.add(path, fp)
+        elif errors is not None:
+            errors[path] = error or 'unknown error'
+    return index
+
+def index_files(
+    paths: Sequence[str],
+    q: Quantization = DEFAULT_QUANTIZATION,
+    index: Optional[SimilarityIndex] = None,
+    *,
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+    errors: Optional[Dict[str, str]] = None,
+) -> SimilarityIndex:
+    """Fingerprint scene files on a process pool and add them to an index keyed by path.
+
+    Files that cannot be decoded are skipped; pass a dict as errors to collect
+    their paths and messages.
+    """
+    index = index if index is not None else SimilarityIndex()
+    if workers == 1 or len(paths) <= 1:
+        results: Iterable[Tuple[Optional[SceneFingerprint], Optional[str]]] = [_fingerprint_file(p, q) for p in paths]
+        return _add_results(index, paths, results, errors)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _add_results(index, paths, pool.map(_fingerprint_file, paths, repeat(q), chunksize=chunksize), errors)
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Find duplicate and near-duplicate scene files.')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('-t', '--threshold', type=float, default=0.9, help='fraction of matching channels (default 0.9)')
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    failed: Dict[str, str] = {}
+    for group in index_files(args.files, workers=args.workers, errors=failed).clusters(args.threshold):
+        print('  '.join(str(k) for k in group))
+    for path, error in failed.items():
+        print(f'{path}: {error}', file=sys.stderr)
+    raise SystemExit(1 if failed else 0)
@@ -181,14 +181,11 @@ class SceneConverterGUI:
             return
 
         try:
-            if enc == 'json':
-                scene.save_json(dst)
-            elif enc == 'm32':
-                if not dst.lower().endswith('.scn'):
-                    dst = dst + '.scn'
-                M32.encode(scene, dst)
-            else:
-                scene.save_json(dst)
+            from export import export_scene
+
+            if enc == 'm32' and not dst.lower().endswith('.scn'):
+                dst = dst + '.scn'
+            export_scene(scene, {enc: dst})
         except Exception as e:
             messagebox.showerror('Save error', f'Failed to save destination file:\n{e}')
             return
@@ -0,0 +1,191 @@
+# lint.py - scene validation with pluggable rules and a single traversal
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type
+
+from main import EqualizerBand, InputChannel, MixerScene, Send
+
+@dataclass
+class Finding:
+    """One problem found in a scene. channel, band and bus are 1-based."""
+    rule: str
+    severity: str
+    message: str
+    channel: Optional[int] = None
+    band: Optional[int] = None
+    bus: Optional[int] = None
+    scene: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class Rule:
+    """Base class for lint rules.
+
+    A fresh instance is made for every scene. lint_scene walks the scene once and
+    calls each hook a rule overrides; finish() runs after the walk, for rules
+    that compare channels with each other. Hooks return findings (or nothing).
+    """
+    code = ''
+    severity = 'warning'
+
+    def finding(self, message: str, **where: Any) -> Finding:
+        return Finding(self.code, self.severity, message, **where)
+
+    def check_channel(self, idx: int, ch: InputChannel) -> Iterable[Finding]:
+        return ()
+
+    def check_band(self, idx: int, ch: InputChannel, b_idx: int, band: EqualizerBand) -> Iterable[Finding]:
+        return ()
+
+    def check_send(self, idx: int, ch: InputChannel, s_idx: int, send: Send) -> Iterable[Finding]:
+        return ()
+
+    def finish(self) -> Iterable[Finding]:
+        return ()
+
+RULES: List[Type[Rule]] = []
+
+def register_rule(cls: Type[Rule]) -> Type[Rule]:
+    """Class decorator adding a rule to the default rule set."""
+    RULES.append(cls)
+    return cls
+
+@register_rule
+class UnitySendOnMutedChannel(Rule):
+    code = 'unity-send-on-muted-channel'
+
+    def check_send(self, idx: int, ch: InputChannel, s_idx: int, send: Send) -> Iterable[Finding]:
+        if ch.is_muted and not send.is_muted and send.level >= 0.0:
+            yield self.finding(f'send at {send.level:+.1f} dB on a muted channel', channel=idx, bus=s_idx)
+
+@register_rule
+class EqFrequencyRange(Rule):
+    code = 'eq-frequency-range'
+    severity = 'error'
+    min_hz = 20.0
+    max_hz = 20000.0
+
+    def check_band(self, idx: int, ch: InputChannel, b_idx: int, band: EqualizerBand) -> Iterable[Finding]:
+        if not self.min_hz <= band.frequency <= self.max_hz:
+            yield self.finding(f'EQ frequency {band.frequency:g} Hz outside {self.min_hz:g}-{self.max_hz:g} Hz', channel=idx, band=b_idx)
+
+@register_rule
+class LowCutTooHigh(Rule):
+    code = 'low-cut-too-high'
+    max_hz = 400.0
+
+    def check_channel(self, idx: int, ch: InputChannel) -> Iterable[Finding]:
+        if ch.low_cut_filter and ch.low_cut_filter_frequency > self.max_hz:
+            yield self.finding(f'low cut at {ch.low_cut_filter_frequency:g} Hz is above {self.max_hz:g} Hz', channel=idx)
+
+@register_rule
+class DuplicateChannelName(Rule):
+    code = 'duplicate-channel-name'
+
+    def __init__(self) -> None:
+        self.seen: Dict[str, List[int]] = {}
+
+    def check_channel(self, idx: int, ch: InputChannel) -> Iterable[Finding]:
+        if ch.name:
+            self.seen.setdefault(ch.name, []).append(idx)
+        return ()
+
+    def finish(self) -> Iterable[Finding]:
+        for name, channels in self.seen.items():
+            if len(channels) > 1:
+                for idx in channels[1:]:
+                    yield self.finding(f'name {name!r} also used by channel {channels[0]}', channel=idx)
+
+def _overrides(rule: Rule, hook: str) -> bool:
+    return getattr(type(rule), hook) is not getattr(Rule, hook)
+
+def lint_scene(scene: MixerScene, rules: Optional[Sequence[Type[Rule]]] = None) -> List[Finding]:
+    """Run all rules over one scene in a single walk of its channels, bands and sends."""
+    active = [cls() for cls in (RULES if rules is None else rules)]
+    # only dispatch to the hooks each rule implements
+    on_channel = [r.check_channel for r in active if _overrides(r, 'check_channel')]
+    on_band = [r.check_band for r in active if _overrides(r, 'check_band')]
+    on_send = [r.check_send for r in active if _overrides(r, 'check_send')]
+
+    findings: List[Finding] = []
+    for idx, ch in enumerate(scene.input_channels.channels, start=1):
+        for check_channel in on_channel:
+            findings.extend(check_channel(idx, ch))
+        if on_band:
+            for b_idx, band in enumerate(ch.equalizer.bands, start=1):
+                for check_band in on_band:
+                    findings.extend(check_band(idx, ch, b_idx, band))
+        if on_send:
+            for s_idx, send in enumerate(ch.bus_sends.sends, start=1):
+                for check_send in on_send:
+                    findings.extend(check_send(idx, ch, s_idx, send))
+    for r in active:
+        findings.extend(r.finish())
+
+    for f in findings:
+        f.scene = scene.name
+    return findings
+
+def lint_scenes(scenes: Iterable[MixerScene], rules: Optional[Sequence[Type[Rule]]] = None) -> List[List[Finding]]:
+    return [lint_scene(scene, rules) for scene in scenes]
+
+def _lint_file(file_path: str, rules: Optional[Sequence[Type[Rule]]] = None) -> List[Finding]:
+    from export import decode_file
+
+    try:
+        scene = decode_file(file_path)
+    except Exception as e:
+        return [Finding('decode-error', 'error', f'could not decode: {e}', scene=file_path)]
+    findings = lint_scene(scene, rules)
+    for f in findings:
+        f.scene = file_path
+    return findings
+
+def lint_files(
+    paths: Sequence[str],
+    rules: Optional[Sequence[Type[Rule]]] = None,
+    *,
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+) -> Dict[str, List[Finding]]:
+    """Lint many files on a process pool.
+
+    rules defaults to the rule set registered in this process; the classes are
+    sent to the workers, so they must be importable top-level classes. Files
+    are handed to workers in chunks to keep per-task overhead low. Findings
+    carry the file path in Finding.scene; a file that cannot be decoded gets a
+    single 'decode-error' finding instead of aborting the run.
+    """
+    # resolve here: workers started with spawn only see the rules their imports register
+    rule_set = list(RULES if rules is None else rules)
+    if workers == 1 or len(paths) <= 1:
+        return {p: _lint_file(p, rule_set) for p in paths}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(paths, pool.map(_lint_file, paths, repeat(rule_set), chunksize=chunksize)))
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description='Check scene files for common problems.')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--json', action='store_true', help='print findings as JSON lines')
+    args = parser.parse_args()
+
+    total = 0
+    for path, found in lint_files(args.files, workers=args.workers).items():
+        for f in found:
+            total += 1
+            if args.json:
+                print(json.dumps(f.to_dict(), ensure_ascii=False))
+            else:
+                where = ''.join(
+                    f' {label}{value}' for label, value in (('ch', f.channel), ('band', f.band), ('bus', f.bus)) if value is not None
+                )
+                print(f'{path}:{where} {f.severity}: {f.message} [{f.rule}]')
+    sys.exit(1 if total else 0)
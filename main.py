@@ -1,9 +1,13 @@
 # main.py - Pyton v3.9.13
 from dataclasses import dataclass, field, asdict
 from enum import Enum
+import io
 import re
 import json
-from typing import Any, Dict, List, Optional, Tuple, cast
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+
+from writers import open_atomic
 
 class EqBandType(Enum):
     PEQ = "peq"
@@ -76,6 +80,95 @@ class InputChannel:
     bus_sends: Sends = field(default_factory=Sends.new)
     fader: float = 0.0 #dB
 
+_CHANNEL_FIELDS = tuple(InputChannel.__dataclass_fields__)
+
+class _LazyField:
+    """Non-data descriptor that parses a lazy channel when a field it lacks is read.
+
+    Once the field is in the instance dict the descriptor is bypassed.
+    """
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj: Any, objtype: Any = None) -> Any:
+        if obj is None:
+            return InputChannel.__dict__.get(self.name, self)
+        obj._fill()
+        return vars(obj)[self.name]
+
+class _LazyInputChannel(InputChannel):
+    """An InputChannel whose lines are parsed the first time a field is read.
+
+    Created by M32.decode(..., lazy=True) with only the name set (read while
+    indexing). The remaining fields are filled from the raw bytes on first
+    access; fields assigned before that are kept.
+    """
+    @classmethod
+    def pending(cls, index: '_ChannelIndex', channel_index: int) -> 'InputChannel':
+        channel = cls.__new__(cls)
+        vars(channel).update(_index=index, _channel_index=channel_index)
+        channel.name = index.names.get(channel_index, '')
+        return channel
+
+    @property
+    def is_loaded(self) -> bool:
+        return '_index' not in vars(self)
+
+    def _fill(self) -> None:
+        state = vars(self)
+        index = state.get('_index')
+        if index is None:
+            return
+        with index.lock:
+            if '_index' not in state:
+                return
+            parsed = index.parse(state['_channel_index'])
+            for name in _CHANNEL_FIELDS:
+                if name not in state:
+                    state[name] = getattr(parsed, name)
+            del state['_index'], state['_channel_index']
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, InputChannel):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in _CHANNEL_FIELDS)
+
+    __hash__ = None  # type: ignore[assignment]
+
+for _name in _CHANNEL_FIELDS:
+    setattr(_LazyInputChannel, _name, _LazyField(_name))
+del _name
+
+class LazyChannelList(list):  # type: ignore[type-arg]
+    """List of InputChannel built by M32.decode(..., lazy=True).
+
+    A plain list whose items parse their own lines the first time one of their
+    fields (other than the name) is read, so every list operation returns real
+    channels. is_loaded(), materialize() and partial() inspect or control that.
+    """
+    def is_loaded(self, i: int) -> bool:
+        item = self[i]
+        return not isinstance(item, _LazyInputChannel) or item.is_loaded
+
+    def materialize(self) -> None:
+        """Parse every channel that has not been read yet."""
+        for item in self:
+            if isinstance(item, _LazyInputChannel):
+                item._fill()
+
+    def partial(self, i: int, props: Any) -> InputChannel:
+        """Return channel i with only the given '/ch/NN/<prop>' lines parsed.
+
+        The result is a fresh InputChannel that is not cached; if the channel has
+        already been parsed, the full channel is returned instead.
+        """
+        item = self[i]
+        state = vars(item)
+        index = state.get('_index')
+        if index is None:
+            return item
+        return index.parse(state['_channel_index'], frozenset(props))
+
 @dataclass
 class InputChannels:
     channels: list[InputChannel] = field(default_factory=lambda: [InputChannel() for _ in range(32)])
@@ -84,6 +177,11 @@ class InputChannels:
     def new(cls):
         return cls(channels=[InputChannel() for _ in range(32)])
 
+    def materialize(self) -> None:
+        """Parse any channels still pending from a lazy decode (no-op otherwise)."""
+        if isinstance(self.channels, LazyChannelList):
+            self.channels.materialize()
+
 @dataclass
 class MixerScene:
     name: str = ""
@@ -112,14 +210,19 @@ class MixerScene:
         raw: Dict[str, Any] = asdict(self)
         return cast(Dict[str, Any], _convert(raw))
 
-    def save_json(self, file_path: str, *, indent: int = 2) -> None:
+    def save_json(self, file_path: str, *, indent: int = 2, compression: Optional[str] = None) -> None:
         """Save the scene as JSON to the given file path.
 
-        Uses UTF-8 and writes human-friendly indented JSON.
+        Uses UTF-8 and writes human-friendly indented JSON. The output is streamed
+        and committed atomically; see writers.open_atomic for compression.
         """
-        with open(file_path, 'w', encoding='utf-8') as f:
+        with open_atomic(file_path, compression=compression) as f:
             json.dump(self.to_dict(), f, ensure_ascii=False, indent=indent)
 
+    def save_m32(self, file_path: str, *, compression: Optional[str] = None) -> None:
+        """Save the scene as an M32 .scn file (see M32.encode)."""
+        M32.encode(self, file_path, compression=compression)
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'MixerScene':
         """Reconstruct a MixerScene from a dict (produced by to_dict)."""
@@ -273,73 +376,350 @@ class MixerScene:
 
     
 
-class M32:
-    @staticmethod
-    def decode(file_path: str) -> MixerScene:
-        # Helper parsers
-        def parse_frequency(s: str) -> float:
-            # support formats like '124.7', '1k97' (=>1970), '10k02' (=>10020)
-            if not s:
-                return 0.0
-            s = s.strip()
-            s_low = s.lower()
-            if 'k' in s_low:
-                # replace the first 'k' with '.' then multiply by 1000
-                s2 = s_low.replace('k', '.', 1)
-                try:
-                    return float(s2) * 1000.0
-                except ValueError:
-                    pass
+# Helper parsers shared by the eager and lazy decode paths
+def _parse_frequency(s: str) -> float:
+    # support formats like '124.7', '1k97' (=>1970), '10k02' (=>10020)
+    if not s:
+        return 0.0
+    s = s.strip()
+    s_low = s.lower()
+    if 'k' in s_low:
+        # replace the first 'k' with '.' then multiply by 1000
+        s2 = s_low.replace('k', '.', 1)
+        try:
+            return float(s2) * 1000.0
+        except ValueError:
+            pass
+    try:
+        return float(s)
+    except ValueError:
+        return 0.0
+
+def _parse_level(s: str) -> float:
+    if not s:
+        return -90.0
+    s = s.strip()
+    if s in ('-oo', '-inf', '-\u221E'):
+        return -90.0
+    # remove + for numeric parse
+    try:
+        return float(s.replace('+', ''))
+    except ValueError:
+        # try to extract a number from the string
+        m = re.search(r'[-+]?[0-9]*\.?[0-9]+', s)
+        if m:
+            return float(m.group(0))
+    return -90.0
+
+def _map_eq_type(s: str) -> EqBandType:
+    if not s:
+        return EqBandType.PEQ
+    t = s.lower()
+    if t.startswith('peq') or t.startswith('veq'):
+        return EqBandType.PEQ
+    if 'h' in t and ('sh' in t or 'shv' in t or 'shelf' in t):
+        return EqBandType.HIGH_SHELF
+    if 'l' in t and ('sh' in t or 'shelf' in t):
+        return EqBandType.LOW_SHELF
+    if 'lcut' in t or t.startswith('lcut'):
+        return EqBandType.LOW_CUT
+    if 'hcut' in t or t.startswith('hcut'):
+        return EqBandType.HIGH_CUT
+    # fallback
+    return EqBandType.PEQ
+
+def _map_insert_type(s: str) -> InsertType:
+    if not s:
+        return InsertType.PRE_FADER
+    t = s.upper()
+    if 'PRE' in t or 'IN' in t:
+        return InsertType.PRE_FADER
+    return InsertType.POST_FADER
+
+def _split_channel_line(s: str) -> Optional[Tuple[int, List[str], List[str]]]:
+    """Split a stripped '/ch/NN/...' line into (channel_index, tokens, path_parts).
+
+    Returns None for lines that do not address one of the 32 input channels.
+    """
+    tokens = s.split()
+    path = tokens[0]
+    path_parts = path.strip('/').split('/')
+    if len(path_parts) < 3 or path_parts[0] != 'ch':
+        return None
+    try:
+        channel_index = int(path_parts[1]) - 1
+    except ValueError:
+        return None
+    if channel_index < 0 or channel_index >= 32:
+        return None
+    return channel_index, tokens, path_parts
+
+def _config_name(s: str, tokens: List[str]) -> Optional[str]:
+    """Channel name from a stripped '/ch/NN/config' line, or None if it has none."""
+    m = re.search(r'config\s+"([^"]+)"', s)
+    if m:
+        return m.group(1)
+    # fallback: take next token without quotes
+    if len(tokens) > 1:
+        return tokens[1].strip('"')
+    return None
+
+def _apply_channel_line(channel: InputChannel, s: str, tokens: List[str], path_parts: List[str]) -> None:
+    """Apply one stripped '/ch/NN/<prop>...' line to the given channel."""
+    path = tokens[0]
+    prop = path_parts[2]
+    rest = s[len(path):].strip()
+
+    # config: contains quoted channel name
+    if prop == 'config':
+        name = _config_name(s, tokens)
+        if name is not None:
+            channel.name = name
+
+    elif prop == 'preamp':
+        # try to find first numeric = gain, last numeric = low_cut_freq (if any)
+        nums = re.findall(r'[-+]?[0-9]*\.?[0-9]+', s)
+        if nums:
             try:
-                return float(s)
+                channel.gain = float(nums[0])
+            except Exception:
+                pass
+            # last numeric value often corresponds to low-cut frequency
+            try:
+                channel.low_cut_filter_frequency = float(nums[-1])
+            except Exception:
+                pass
+        # whether any ON appears after preamp likely indicates low_cut present
+        channel.low_cut_filter = 'ON' in s
+
+    elif prop == 'eq':
+        # top-level eq on/off
+        if len(path_parts) == 3:
+            channel.equalizer_enabled = ('ON' in rest)
+        # specific band: /ch/01/eq/1 ...
+        elif len(path_parts) == 4:
+            try:
+                band_index = int(path_parts[3]) - 1
             except ValueError:
-                return 0.0
-
-        def parse_level(s: str) -> float:
-            if not s:
-                return -90.0
-            s = s.strip()
-            if s in ('-oo', '-inf', '-\u221E'):
-                return -90.0
-            # remove + for numeric parse
+                return
+            if band_index < 0 or band_index >= 4:
+                return
+            tokens_rest = rest.split()
+            if not tokens_rest:
+                return
+            typ = tokens_rest[0]
+            freq = tokens_rest[1] if len(tokens_rest) > 1 else ''
+            gain = tokens_rest[2] if len(tokens_rest) > 2 else ''
+            width = tokens_rest[3] if len(tokens_rest) > 3 else ''
+            band = channel.equalizer.bands[band_index]
+            band.type = _map_eq_type(typ)
+            band.frequency = _parse_frequency(freq) if freq else band.frequency
+            band.gain = _parse_level(gain) if gain else band.gain
+            try:
+                band.width = float(width)
+            except Exception:
+                pass
+
+    elif prop == 'pan':
+        tokens_rest = rest.split()
+        if tokens_rest:
+            p = _parse_level(tokens_rest[0])
+            # assume pan is -100..100 -> convert to -1..1
+            channel.pan = max(-1.0, min(1.0, p / 100.0))
+
+    elif prop == 'mix':
+        # either a summary line (/ch/01/mix) or a send (/ch/01/mix/01)
+        if len(path_parts) == 4:
             try:
-                return float(s.replace('+', ''))
+                send_index = int(path_parts[3]) - 1
             except ValueError:
-                # try to extract a number from the string
-                m = re.search(r'[-+]?[0-9]*\.?[0-9]+', s)
-                if m:
-                    return float(m.group(0))
-            return -90.0
+                return
+            if send_index < 0 or send_index >= len(channel.bus_sends.sends):
+                return
+            tokens_rest = rest.split()
+            if not tokens_rest:
+                return
+            is_muted = tokens_rest[0] == 'OFF'
+            fader = _parse_level(tokens_rest[1]) if len(tokens_rest) > 1 else -90.0
+            insert_token = tokens_rest[3] if len(tokens_rest) > 3 else ''
+            send = channel.bus_sends.sends[send_index]
+            send.is_muted = is_muted
+            send.level = fader
+            send.type = _map_insert_type(insert_token)
+
+    elif prop == 'fader':
+        tokens_rest = rest.split()
+        if tokens_rest:
+            channel.fader = _parse_level(tokens_rest[0])
+
+# Scanners for lazy decoding. Both start with a literal so the regex engine can
+# skip ahead quickly; _line_start() rejects matches that are not at the start of
+# a line, and matched lines are re-validated when a channel is parsed.
+_HEADER_LINE_RE = re.compile(rb'#[^"\n]*"([^"\n]+)"')
+# one match per contiguous run of lines addressing the same '/ch/NN/'
+_CHANNEL_BLOCK_RE = re.compile(rb'/ch/(\d+)/[^\n]*(?:\n[ \t]*/ch/\1/[^\n]*)*\n?')
+# the name of a '/ch/NN/config' line, quoted or as its first token (see _config_name)
+_CONFIG_NAME_RE = re.compile(rb'[ \t]*/ch/(\d+)/config[ \t]+(?:"([^"\n]+)"|(\S+))')
+
+def _line_start(data: bytes, pos: int) -> int:
+    """Return the offset of the line containing pos, or -1 if text precedes pos on it."""
+    start = data.rfind(b'\n', 0, pos) + 1
+    return start if not data[start:pos].strip() else -1
+
+def _next_line(data: bytes, pos: int) -> int:
+    end = data.find(b'\n', pos)
+    return len(data) if end < 0 else end + 1
+
+class _ChannelIndex:
+    """Byte offsets of each channel's '/ch/NN/' lines in a raw .scn file.
+
+    Used by lazy decoding: the raw bytes are kept and a channel is only parsed
+    when it is first read from the scene. Channel names are read while
+    indexing so listing them parses nothing else. The index is not modified
+    after decoding, so copies of a lazy scene share it.
+    """
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.spans: Dict[int, List[Tuple[int, int]]] = {}
+        self.names: Dict[int, str] = {}
+        self.lock = threading.Lock()
+
+    def __copy__(self) -> '_ChannelIndex':
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> '_ChannelIndex':
+        return self
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(vars(self))
+        del state['lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        vars(self).update(state)
+        self.lock = threading.Lock()
+
+    def add(self, channel_index: int, start: int, end: int) -> None:
+        # the last config line of the block wins, as in the eager decoder
+        data = self.data
+        pos = data.rfind(b'/config', start, end)
+        while pos >= 0:
+            m = _CONFIG_NAME_RE.match(data, max(start, data.rfind(b'\n', start, pos) + 1), end)
+            if m is not None and int(m.group(1)) - 1 == channel_index:
+                quoted = m.group(2)
+                name = quoted if quoted is not None else m.group(3).strip(b'"')
+                self.names[channel_index] = name.decode('utf-8')
+                break
+            pos = data.rfind(b'/config', start, pos)
+        spans = self.spans.setdefault(channel_index, [])
+        # channel lines are usually contiguous, so merge adjacent spans
+        if spans and spans[-1][1] == start:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+
+    def parse(self, channel_index: int, props: Optional[frozenset] = None) -> InputChannel:
+        """Parse one channel; props limits parsing to those '/ch/NN/<prop>' lines."""
+        channel = InputChannel()
+        for start, end in self.spans.get(channel_index, ()):
+            for line in self.data[start:end].decode('utf-8').splitlines():
+                s = line.strip()
+                if not s:
+                    continue
+                split = _split_channel_line(s)
+                if split is None or split[0] != channel_index:
+                    continue
+                if props is not None and split[2][2] not in props:
+                    continue
+                _apply_channel_line(channel, s, split[1], split[2])
+        return channel
+
+# Helper formatters for the encoder
+def _fmt_freq_human(hz: float) -> str:
+    """Format frequency for M32 .scn files.
+
+    Preserve the compact k-notation the original files use:
+    - <1000 Hz: integer if whole, else one decimal (e.g. 124.7)
+    - >=1000 and <100000: show as '1k97' for 1970, '10k02' for 10020
+      (two significant digits from the remainder, preserving leading zeroes)
+    - Fallback: one decimal when not integer.
+    """
+    try:
+        hz_f = float(hz)
+    except Exception:
+        return str(hz)
+    if hz_f < 1000.0:
+        if hz_f.is_integer():
+            return str(int(hz_f))
+        return f'{hz_f:.1f}'
+    # k-notation: keep two digits from remainder but trim a trailing zero
+    if 1000.0 <= hz_f < 100000.0:
+        k = int(hz_f // 1000)
+        rem = int(round(hz_f - k * 1000))
+        # clamp rem to [0,999]
+        rem = max(0, min(999, rem))
+        # Format remainder as 3 digits then strip a trailing zero if present
+        # so 1970 -> '1k97' (rem=970 -> '970' -> strip trailing '0' -> '97')
+        rem_str_3 = f'{rem:03d}'
+        if rem_str_3.endswith('0'):
+            rem_str = rem_str_3[:-1]
+        else:
+            rem_str = rem_str_3
+        return f'{k}k{rem_str}'
+    # fallback
+    if hz_f.is_integer():
+        return str(int(hz_f))
+    return f'{hz_f:.1f}'
+
+def _eq_type_token(bt: EqBandType) -> str:
+    # map type to the short tokens used by M32 .scn files
+    if bt == EqBandType.PEQ:
+        return 'PEQ'
+    if bt == EqBandType.HIGH_SHELF:
+        return 'HShv'
+    if bt == EqBandType.LOW_SHELF:
+        return 'LShv'
+    if bt == EqBandType.LOW_CUT:
+        return 'LCut'
+    if bt == EqBandType.HIGH_CUT:
+        return 'HCut'
+    return 'PEQ'
 
-        def map_eq_type(s: str) -> EqBandType:
-            if not s:
-                return EqBandType.PEQ
-            t = s.lower()
-            if t.startswith('peq') or t.startswith('veq'):
-                return EqBandType.PEQ
-            if 'h' in t and ('sh' in t or 'shv' in t or 'shelf' in t):
-                return EqBandType.HIGH_SHELF
-            if 'l' in t and ('sh' in t or 'shelf' in t):
-                return EqBandType.LOW_SHELF
-            if 'lcut' in t or t.startswith('lcut'):
-                return EqBandType.LOW_CUT
-            if 'hcut' in t or t.startswith('hcut'):
-                return EqBandType.HIGH_CUT
-            # fallback
-            return EqBandType.PEQ
-
-        def map_insert_type(s: str) -> InsertType:
-            if not s:
-                return InsertType.PRE_FADER
-            t = s.upper()
-            if 'PRE' in t or 'IN' in t:
-                return InsertType.PRE_FADER
-            return InsertType.POST_FADER
+class M32:
+    @staticmethod
+    def decode(file_path: str, *, lazy: bool = False) -> MixerScene:
+        """Decode an M32 .scn file into a MixerScene.
+
+        With lazy=True only the byte offsets of each '/ch/NN/' block and the
+        channel names are read; the rest of a channel is parsed the first time
+        one of its other fields is read.
+        """
+        if lazy:
+            with open(file_path, 'rb') as file:
+                return M32._decode_lazy(file.read())
 
-        scene = MixerScene.new()
         with open(file_path, 'r', encoding='utf-8') as file:
             lines = file.readlines()
+        return M32._decode_lines(lines)
+
+    @staticmethod
+    def decode_bytes(data: bytes, *, lazy: bool = False) -> MixerScene:
+        """Decode the raw bytes of an M32 .scn file, e.g. after decompressing it.
+
+        Lines are split as when reading the file in text mode; lazy is as for decode().
+        """
+        if lazy:
+            return M32._decode_lazy(data)
+        return M32._decode_lines(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').readlines())
 
+    @staticmethod
+    def decode_text(text: str) -> MixerScene:
+        """Decode the contents of an M32 .scn file held in memory."""
+        return M32._decode_lines(text.splitlines())
+
+    @staticmethod
+    def _decode_lines(lines: List[str]) -> MixerScene:
+        scene = MixerScene.new()
         for line in lines:
             s = line.strip()
             if not s:
@@ -354,208 +734,114 @@ class M32:
             if not s.startswith('/ch/'):
                 continue
 
-            tokens = s.split()
-            path = tokens[0]
-            path_parts = path.strip('/').split('/')
-            if len(path_parts) < 3 or path_parts[0] != 'ch':
-                continue
-            try:
-                channel_index = int(path_parts[1]) - 1
-            except ValueError:
-                continue
-            if channel_index < 0 or channel_index >= len(scene.input_channels.channels):
+            split = _split_channel_line(s)
+            if split is None:
                 continue
+            channel_index, tokens, path_parts = split
             channel = scene.input_channels.channels[channel_index]
+            _apply_channel_line(channel, s, tokens, path_parts)
 
-            prop = path_parts[2]
-            rest = s[len(path):].strip()
+        return scene
 
-            # config: contains quoted channel name
-            if prop == 'config':
-                m = re.search(r'config\s+"([^"]+)"', s)
-                if m:
-                    channel.name = m.group(1)
-                else:
-                    # fallback: take next token without quotes
-                    if len(tokens) > 1:
-                        channel.name = tokens[1].strip('"')
-
-            elif prop == 'preamp':
-                # try to find first numeric = gain, last numeric = low_cut_freq (if any)
-                nums = re.findall(r'[-+]?[0-9]*\.?[0-9]+', s)
-                if nums:
-                    try:
-                        channel.gain = float(nums[0])
-                    except Exception:
-                        pass
-                    # last numeric value often corresponds to low-cut frequency
-                    try:
-                        channel.low_cut_filter_frequency = float(nums[-1])
-                    except Exception:
-                        pass
-                # whether any ON appears after preamp likely indicates low_cut present
-                channel.low_cut_filter = 'ON' in s
-
-            elif prop == 'eq':
-                # top-level eq on/off
-                if len(path_parts) == 3:
-                    channel.equalizer_enabled = ('ON' in rest)
-                # specific band: /ch/01/eq/1 ...
-                elif len(path_parts) == 4:
-                    try:
-                        band_index = int(path_parts[3]) - 1
-                    except ValueError:
-                        continue
-                    if band_index < 0 or band_index >= 4:
-                        continue
-                    tokens_rest = rest.split()
-                    if not tokens_rest:
-                        continue
-                    typ = tokens_rest[0]
-                    freq = tokens_rest[1] if len(tokens_rest) > 1 else ''
-                    gain = tokens_rest[2] if len(tokens_rest) > 2 else ''
-                    width = tokens_rest[3] if len(tokens_rest) > 3 else ''
-                    band = channel.equalizer.bands[band_index]
-                    band.type = map_eq_type(typ)
-                    band.frequency = parse_frequency(freq) if freq else band.frequency
-                    band.gain = parse_level(gain) if gain else band.gain
-                    try:
-                        band.width = float(width)
-                    except Exception:
-                        pass
-
-            elif prop == 'pan':
-                tokens_rest = rest.split()
-                if tokens_rest:
-                    p = parse_level(tokens_rest[0])
-                    # assume pan is -100..100 -> convert to -1..1
-                    channel.pan = max(-1.0, min(1.0, p / 100.0))
-
-            elif prop == 'mix':
-                # either a summary line (/ch/01/mix) or a send (/ch/01/mix/01)
-                if len(path_parts) == 4:
-                    try:
-                        send_index = int(path_parts[3]) - 1
-                    except ValueError:
-                        continue
-                    if send_index < 0 or send_index >= len(channel.bus_sends.sends):
-                        continue
-                    tokens_rest = rest.split()
-                    if not tokens_rest:
-                        continue
-                    is_muted = tokens_rest[0] == 'OFF'
-                    fader = parse_level(tokens_rest[1]) if len(tokens_rest) > 1 else -90.0
-                    insert_token = tokens_rest[3] if len(tokens_rest) > 3 else ''
-                    send = channel.bus_sends.sends[send_index]
-                    send.is_muted = is_muted
-                    send.level = fader
-                    send.type = map_insert_type(insert_token)
-
-            elif prop == 'fader':
-                tokens_rest = rest.split()
-                if tokens_rest:
-                    channel.fader = parse_level(tokens_rest[0])
+    @staticmethod
+    def _decode_lazy(data: bytes) -> MixerScene:
+        name = ''
+        pos = 0
+        while True:
+            m = _HEADER_LINE_RE.search(data, pos)
+            if m is None:
+                break
+            if _line_start(data, m.start()) >= 0:
+                name = m.group(1).decode('utf-8')
+            pos = _next_line(data, m.start())
+
+        index = _ChannelIndex(data)
+        pos = 0
+        while True:
+            m = _CHANNEL_BLOCK_RE.search(data, pos)
+            if m is None:
+                break
+            start = _line_start(data, m.start())
+            if start < 0:
+                pos = _next_line(data, m.start())
+                continue
+            channel_index = int(m.group(1)) - 1
+            if 0 <= channel_index < 32:
+                index.add(channel_index, start, m.end())
+            pos = m.end()
 
-        return scene
+        channels = LazyChannelList(_LazyInputChannel.pending(index, i) for i in range(32))
+        return MixerScene(name=name, input_channels=InputChannels(channels=channels))
 
     @staticmethod
-    def encode(scene: MixerScene, file_path: str) -> None:
+    def encode(scene: MixerScene, file_path: str, *, compression: Optional[str] = None) -> None:
         """Save a minimal M32 .scn file representing this MixerScene.
 
         This writes a simple textual representation compatible with the decoder in this
         repository. It intentionally writes only a small subset (header + per-channel
         config, preamp, eq and mix/send lines) to keep the encoder compact and safe.
+
+        Lines are streamed to the file and committed atomically; see writers.open_atomic
+        for the compression options (inferred from the extension by default).
         """
-        lines: list[str] = []
-        # header: version and scene name
-        lines.append('#4.0# "{}" "" %000000000 1'.format(scene.name or 'Scene'))
+        with open_atomic(file_path, compression=compression) as f:
+            for line in M32.iter_lines(scene):
+                f.write(line)
+                f.write('\n')
 
+    @staticmethod
+    def encode_text(scene: MixerScene) -> str:
+        """Return the .scn file contents M32.encode would write."""
+        return ''.join(line + '\n' for line in M32.iter_lines(scene))
+
+    @staticmethod
+    def iter_lines(scene: MixerScene) -> Iterator[str]:
+        """Yield the .scn lines for a scene, without trailing newlines."""
+        yield M32.header_line(scene.name)
         for idx, ch in enumerate(scene.input_channels.channels, start=1):
-            prefix = f'/ch/{idx:02d}'
-            # config line with name
-            lines.append(f'{prefix}/config "{ch.name}" 1 WH {idx}')
-            # preamp: gain, low_cut presence and frequency
-            low_cut_flag = 'ON' if ch.low_cut_filter else 'OFF'
-            lines.append(f'{prefix}/preamp {ch.gain:+.1f} OFF {low_cut_flag} 24  {int(ch.low_cut_filter_frequency)}')
-            # eq on/off
-            eq_on = 'ON' if ch.equalizer_enabled else 'OFF'
-            lines.append(f'{prefix}/eq {eq_on}')
-            # eq bands
-            def fmt_freq_human(hz: float) -> str:
-                """Format frequency for M32 .scn files.
-
-                Preserve the compact k-notation the original files use:
-                - <1000 Hz: integer if whole, else one decimal (e.g. 124.7)
-                - >=1000 and <100000: show as '1k97' for 1970, '10k02' for 10020
-                  (two significant digits from the remainder, preserving leading zeroes)
-                - Fallback: one decimal when not integer.
-                """
-                try:
-                    hz_f = float(hz)
-                except Exception:
-                    return str(hz)
-                if hz_f < 1000.0:
-                    if hz_f.is_integer():
-                        return str(int(hz_f))
-                    return f'{hz_f:.1f}'
-                # k-notation: keep two digits from remainder but trim a trailing zero
-                if 1000.0 <= hz_f < 100000.0:
-                    k = int(hz_f // 1000)
-                    rem = int(round(hz_f - k * 1000))
-                    # clamp rem to [0,999]
-                    rem = max(0, min(999, rem))
-                    # Format remainder as 3 digits then strip a trailing zero if present
-                    # so 1970 -> '1k97' (rem=970 -> '970' -> strip trailing '0' -> '97')
-                    rem_str_3 = f'{rem:03d}'
-                    if rem_str_3.endswith('0'):
-                        rem_str = rem_str_3[:-1]
-                    else:
-                        rem_str = rem_str_3
-                    return f'{k}k{rem_str}'
-                # fallback
-                if hz_f.is_integer():
-                    return str(int(hz_f))
-                return f'{hz_f:.1f}'
-
-            for b_idx, band in enumerate(ch.equalizer.bands, start=1):
-                # map type to the short tokens used by M32 .scn files
-                def eq_type_token(bt: EqBandType) -> str:
-                    if bt == EqBandType.PEQ:
-                        return 'PEQ'
-                    if bt == EqBandType.HIGH_SHELF:
-                        return 'HShv'
-                    if bt == EqBandType.LOW_SHELF:
-                        return 'LShv'
-                    if bt == EqBandType.LOW_CUT:
-                        return 'LCut'
-                    if bt == EqBandType.HIGH_CUT:
-                        return 'HCut'
-                    return 'PEQ'
-
-                t = eq_type_token(band.type)
-                freq = fmt_freq_human(band.frequency)
-                # preserve single-decimal for gain when integer-like but keep +/-, and width one decimal
-                gain_str = f'{band.gain:+.2f}' if (abs(band.gain) < 100 and (band.gain != int(band.gain))) else f'{band.gain:+.1f}'
-                lines.append(f'{prefix}/eq/{b_idx} {t} {freq} {gain_str} {band.width:.1f}')
-
-            # mix summary (write fader and ON). Preserve '-oo' when fader indicates -90.0 sentinel.
-            fader_str = '-oo' if ch.fader <= -90.0 else f'{ch.fader:+.1f}'
-            lines.append(f'{prefix}/mix ON {fader_str} ON +0 OFF   -oo')
-            # sends
-            for s_idx, send in enumerate(ch.bus_sends.sends, start=1):
-                is_on = 'ON' if not send.is_muted else 'OFF'
-                try:
-                    level = float(send.level)
-                except Exception:
-                    level = -90.0
-                # preserve -oo marker for very low levels
-                level_str = '-oo' if level <= -90.0 else f'{level:+.1f}'
-                insert = 'PRE' if send.type == InsertType.PRE_FADER else 'POST'
-                lines.append(f'{prefix}/mix/{s_idx} {is_on} {level_str} {"+0"} {insert} 0')
+            yield from M32.channel_lines(idx, ch)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines) + '\n')
+    @staticmethod
+    def header_line(name: str) -> str:
+        # header: version and scene name
+        return '#4.0# "{}" "" %000000000 1'.format(name or 'Scene')
 
+    @staticmethod
+    def channel_lines(idx: int, ch: InputChannel) -> List[str]:
+        """Render the .scn lines of one input channel (idx is 1-based)."""
+        lines: list[str] = []
+        prefix = f'/ch/{idx:02d}'
+        # config line with name
+        lines.append(f'{prefix}/config "{ch.name}" 1 WH {idx}')
+        # preamp: gain, low_cut presence and frequency
+        low_cut_flag = 'ON' if ch.low_cut_filter else 'OFF'
+        lines.append(f'{prefix}/preamp {ch.gain:+.1f} OFF {low_cut_flag} 24  {int(ch.low_cut_filter_frequency)}')
+        # eq on/off
+        eq_on = 'ON' if ch.equalizer_enabled else 'OFF'
+        lines.append(f'{prefix}/eq {eq_on}')
+        # eq bands
+        for b_idx, band in enumerate(ch.equalizer.bands, start=1):
+            t = _eq_type_token(band.type)
+            freq = _fmt_freq_human(band.frequency)
+            # preserve single-decimal for gain when integer-like but keep +/-, and width one decimal
+            gain_str = f'{band.gain:+.2f}' if (abs(band.gain) < 100 and (band.gain != int(band.gain))) else f'{band.gain:+.1f}'
+            lines.append(f'{prefix}/eq/{b_idx} {t} {freq} {gain_str} {band.width:.1f}')
+
+        # mix summary (write fader and ON). Preserve '-oo' when fader indicates -90.0 sentinel.
+        fader_str = '-oo' if ch.fader <= -90.0 else f'{ch.fader:+.1f}'
+        lines.append(f'{prefix}/mix ON {fader_str} ON +0 OFF   -oo')
+        # sends
+        for s_idx, send in enumerate(ch.bus_sends.sends, start=1):
+            is_on = 'ON' if not send.is_muted else 'OFF'
+            try:
+                level = float(send.level)
+            except Exception:
+                level = -90.0
+            # preserve -oo marker for very low levels
+            level_str = '-oo' if level <= -90.0 else f'{level:+.1f}'
+            insert = 'PRE' if send.type == InsertType.PRE_FADER else 'POST'
+            lines.append(f'{prefix}/mix/{s_idx} {is_on} {level_str} {"+0"} {insert} 0')
+        return lines
 
 if __name__ == '__main__':
     # Launch the GUI if possible, otherwise do nothing.
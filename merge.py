@@ -0,0 +1,227 @@
+# merge.py - combine channel sections from several scenes
+from concurrent.futures import ThreadPoolExecutor
+import copy
+from dataclasses import dataclass, field
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from main import M32, InputChannel, LazyChannelList, MixerScene
+from telemetry import Telemetry
+from writers import COMPRESSION_EXTENSIONS, read_bytes
+
+# section -> (InputChannel fields copied, '/ch/NN/<prop>' lines the decoder needs)
+SECTIONS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    'name': (('name',), ('config',)),
+    'preamp': (('gain', 'low_cut_filter', 'low_cut_filter_frequency'), ('preamp',)),
+    'eq': (('equalizer', 'equalizer_enabled'), ('eq',)),
+    'pan': (('pan',), ('pan',)),
+    'sends': (('bus_sends',), ('mix',)),
+    'fader': (('fader',), ('fader',)),
+    'mute': (('is_muted',), ('mix',)),
+}
+
+def parse_channels(spec: Any, upper: int = 32) -> Tuple[int, ...]:
+    """Parse a 1-based selection such as '1-8,12' or [1, 2, 3], checking 1..upper."""
+    if isinstance(spec, int):
+        channels = [spec]
+    elif isinstance(spec, str):
+        channels = []
+        for part in spec.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            lo, sep, hi = part.partition('-')
+            if sep:
+                channels.extend(range(int(lo), int(hi) + 1))
+            else:
+                channels.append(int(part))
+    else:
+        channels = [int(c) for c in spec]
+    for c in channels:
+        if c < 1 or c > upper:
+            raise ValueError(f'Number out of range 1-{upper}: {c}')
+    return tuple(channels)
+
+@dataclass
+class MergeRule:
+    """Copy sections of the given source channels onto the merged scene.
+
+    Channels are 1-based. to_channels defaults to the same channel numbers.
+    """
+    source: str
+    channels: Tuple[int, ...]
+    sections: Tuple[str, ...]
+    to_channels: Optional[Tuple[int, ...]] = None
+
+    def __post_init__(self) -> None:
+        for s in self.sections:
+            if s not in SECTIONS:
+                raise ValueError(f'Unknown section: {s!r}')
+        if self.to_channels is not None and len(self.to_channels) != len(self.channels):
+            raise ValueError('to_channels must list as many channels as channels')
+
+    def props(self) -> Tuple[str, ...]:
+        return tuple(p for s in self.sections for p in SECTIONS[s][1])
+
+@dataclass
+class MergeSpec:
+    """A merged scene: an optional base scene plus rules applied in order."""
+    output: str
+    rules: List[MergeRule] = field(default_factory=list)
+    base: Optional[str] = None
+    name: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MergeSpec':
+        """Build a spec from e.g.
+        {"output": "show.scn", "base": "a.scn", "rules": [
+            {"source": "b.scn", "channels": "1-8", "sections": ["sends"], "to": "9-16"}]}
+        """
+        rules: List[MergeRule] = []
+        for rd in data.get('rules', []):
+            sections = rd.get('sections', list(SECTIONS))
+            if isinstance(sections, str):
+                sections = [sections]
+            rules.append(MergeRule(
+                source=rd['source'],
+                channels=parse_channels(rd.get('channels', '1-32')),
+                sections=tuple(sections),
+                to_channels=parse_channels(rd['to']) if 'to' in rd else None,
+            ))
+        return cls(output=data['output'], rules=rules, base=data.get('base'), name=data.get('name'))
+
+    def sources(self) -> List[str]:
+        paths = [self.base] if self.base else []
+        paths.extend(r.source for r in self.rules)
+        return list(dict.fromkeys(paths))
+
+@dataclass
+class MergeResult:
+    output: str
+    error: Optional[str] = None
+
+def _is_json(file_path: str) -> bool:
+    stem, ext = os.path.splitext(file_path.lower())
+    if ext in COMPRESSION_EXTENSIONS:
+        _, ext = os.path.splitext(stem)
+    return ext == '.json'
+
+def _load_source(file_path: str, telemetry: Optional[Telemetry] = None) -> MixerScene:
+    # compressed sources (.scn.gz, .json.xz, ...) are decompressed by extension
+    if telemetry is None:
+        return _decode_source(file_path, read_bytes(file_path))
+    with telemetry.stage('load', file_path) as rec:
+        data = read_bytes(file_path)
+        rec.lines = data.count(b'\n')
+        return _decode_source(file_path, data)
+
+def _decode_source(file_path: str, data: bytes) -> MixerScene:
+    # .scn sources are decoded lazily so only the channels and sections a merge
+    # reads are ever parsed
+    if _is_json(file_path):
+        scene_dict = json.loads(data)
+        if not isinstance(scene_dict, dict):
+            raise ValueError(f'{file_path}: scene JSON must be an object')
+        return MixerScene.from_dict(scene_dict)
+    return M32.decode_bytes(data, lazy=True)
+
+def _read_channel(scene: MixerScene, i: int, props: Tuple[str, ...]) -> InputChannel:
+    channels = scene.input_channels.channels
+    if isinstance(channels, LazyChannelList):
+        return channels.partial(i, props)
+    return channels[i]
+
+def merge_scenes(spec: MergeSpec, sources: Dict[str, MixerScene]) -> MixerScene:
+    """Build the merged scene from already loaded sources (keyed by path)."""
+    if spec.base:
+        merged = copy.deepcopy(sources[spec.base])
+    else:
+        merged = MixerScene.new()
+    if spec.name is not None:
+        merged.name = spec.name
+
+    for rule in spec.rules:
+        src = sources[rule.source]
+        props = rule.props()
+        targets = rule.to_channels or rule.channels
+        for src_no, dst_no in zip(rule.channels, targets):
+            src_ch = _read_channel(src, src_no - 1, props)
+            dst_ch = merged.input_channels.channels[dst_no - 1]
+            for section in rule.sections:
+                for attr in SECTIONS[section][0]:
+                    # sources are shared between specs, so never alias their objects
+                    setattr(dst_ch, attr, copy.deepcopy(getattr(src_ch, attr)))
+    return merged
+
+def _write(scene: MixerScene, file_path: str) -> None:
+    if _is_json(file_path):
+        scene.save_json(file_path)
+    else:
+        M32.encode(scene, file_path)
+
+def _timed(telemetry: Optional[Telemetry], stage: str, file: str, fn: Any, *args: Any) -> Any:
+    if telemetry is None:
+        return fn(*args)
+    with telemetry.stage(stage, file):
+        return fn(*args)
+
+def merge_batch(specs: Iterable[MergeSpec], *, max_workers: Optional[int] = None, telemetry: Optional[Telemetry] = None) -> List[MergeResult]:
+    """Run many merges, loading every distinct source file only once.
+
+    Errors are reported per spec in MergeResult.error; results follow the order of specs.
+    Pass a Telemetry to record 'load' stages per source and 'merge' stages per output.
+    """
+    specs = list(specs)
+    paths = list(dict.fromkeys(p for spec in specs for p in spec.sources()))
+    sources: Dict[str, MixerScene] = {}
+    load_errors: Dict[str, str] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for path, fut in [(p, pool.submit(_load_source, p, telemetry)) for p in paths]:
+            try:
+                sources[path] = fut.result()
+            except Exception as e:
+                load_errors[path] = str(e)
+        # bases are copied whole; parse them up front rather than from several threads
+        for spec in specs:
+            if spec.base in sources:
+                sources[spec.base].input_channels.materialize()
+
+        def run(spec: MergeSpec) -> MergeResult:
+            missing = [p for p in spec.sources() if p in load_errors]
+            if missing:
+                return MergeResult(spec.output, f'failed to load {missing[0]}: {load_errors[missing[0]]}')
+            try:
+                _timed(telemetry, 'merge', spec.output, lambda: _write(merge_scenes(spec, sources), spec.output))
+            except Exception as e:
+                return MergeResult(spec.output, str(e))
+            return MergeResult(spec.output)
+
+        return list(pool.map(run, specs))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Merge channel sections from several scenes.')
+    parser.add_argument('spec_file', help='JSON file with a merge spec or a list of specs')
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--telemetry', metavar='PATH', help='write a telemetry report (JSON, or Prometheus text for *.prom)')
+    args = parser.parse_args()
+
+    with open(args.spec_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    spec_list = [MergeSpec.from_dict(d) for d in (data if isinstance(data, list) else [data])]
+    telemetry = Telemetry(output=args.telemetry) if args.telemetry else None
+    failed = 0
+    results = merge_batch(spec_list, max_workers=args.workers, telemetry=telemetry)
+    if telemetry is not None:
+        telemetry.close()
+    for res in results:
+        if res.error:
+            failed += 1
+            print(f'{res.output}: {res.error}')
+        else:
+            print(res.output)
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,359 @@
+# server.py - local HTTP conversion service
+"""Scene conversion over HTTP, for tools that cannot drive the Tk GUI.
+
+Endpoints:
+    POST /convert?to=json|m32[&from=json|m32]
+        Body is one scene file; the response body is the converted file.
+        'from' is guessed from the content when omitted.
+    POST /batch?to=json,m32
+        Body is JSON: {"files": [{"name": "...", "content": "...", "from": "m32"}]}.
+        Responds with {"results": [{"name": ..., "outputs": {fmt: content}, "error": ...}]}.
+    GET /metrics
+        Prometheus text: request latency histograms, queue depth and counters.
+    GET /health
+
+Decoding and encoding run on a process pool. Identical uploads that are in
+flight at the same time are converted once. Single conversions and batches have
+separate limits, so a large batch cannot starve /convert:
+    - /convert answers 503 once max_pending single conversions are queued.
+    - The files of all accepted batches share max_batch_pending (default
+      max_pending) executor slots and wait for a free one instead of failing.
+      A new /batch answers 503 while max_pending files are already waiting.
+Request bodies need a Content-Length; chunked uploads get 501.
+
+Run with: python server.py --port 8032 --workers 4
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from main import M32, MixerScene
+
+FORMATS = ('json', 'm32')
+
+CONTENT_TYPES: Dict[str, str] = {
+    'json': 'application/json; charset=utf-8',
+    'm32': 'text/plain; charset=utf-8',
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def guess_format(content: str) -> str:
+    return 'json' if content.lstrip().startswith('{') else 'm32'
+
+def convert_content(content: str, src: str, targets: Sequence[str]) -> Dict[str, str]:
+    """Decode content once and encode it to every target format.
+
+    Runs in the worker processes, so it must stay a picklable top-level function.
+    """
+    if src == 'json':
+        data = json.loads(content)
+        if not isinstance(data, dict):
+            raise ValueError('Scene JSON must be an object')
+        try:
+            scene = MixerScene.from_dict(data)
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f'Invalid scene JSON: {e!r}')
+    elif src == 'm32':
+        scene = M32.decode_text(content)
+    else:
+        raise ValueError(f'Unknown source format: {src!r}')
+
+    outputs: Dict[str, str] = {}
+    for fmt in targets:
+        if fmt == 'json':
+            outputs[fmt] = json.dumps(scene.to_dict(), ensure_ascii=False, indent=2)
+        elif fmt == 'm32':
+            outputs[fmt] = M32.encode_text(scene)
+        else:
+            raise ValueError(f'Unknown target format: {fmt!r}')
+    return outputs
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class Metrics:
+    """Service metrics, rendered in the Prometheus text format."""
+    def __init__(self) -> None:
+        self.latency: Dict[str, _Histogram] = {}
+        self.requests: Dict[Tuple[str, int], int] = {}
+        self.coalesced = 0
+        self.rejected = 0
+        self.pending = 0
+
+    def observe(self, endpoint: str, status: int, seconds: float) -> None:
+        self.latency.setdefault(endpoint, _Histogram()).observe(seconds)
+        key = (endpoint, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def render(self) -> str:
+        out: List[str] = []
+        out.append('# TYPE scene_request_duration_seconds histogram')
+        for endpoint, h in sorted(self.latency.items()):
+            for bound, count in zip(h.buckets, h.counts):
+                out.append(f'scene_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+            out.append(f'scene_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {h.total}')
+            out.append(f'scene_request_duration_seconds_sum{{endpoint="{endpoint}"}} {h.sum:.6f}')
+            out.append(f'scene_request_duration_seconds_count{{endpoint="{endpoint}"}} {h.total}')
+        out.append('# TYPE scene_requests_total counter')
+        for (endpoint, status), count in sorted(self.requests.items()):
+            out.append(f'scene_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        out.append('# TYPE scene_queue_depth gauge')
+        out.append(f'scene_queue_depth {self.pending}')
+        out.append('# TYPE scene_coalesced_total counter')
+        out.append(f'scene_coalesced_total {self.coalesced}')
+        out.append('# TYPE scene_rejected_total counter')
+        out.append(f'scene_rejected_total {self.rejected}')
+        return '\n'.join(out) + '\n'
+
+class ConversionService:
+    """Runs conversions on an executor with a bounded queue and request coalescing."""
+    def __init__(
+        self,
+        executor: Executor,
+        *,
+        max_pending: int = 64,
+        max_batch_pending: Optional[int] = None,
+        max_body: int = 16 * 1024 * 1024,
+    ) -> None:
+        self.executor = executor
+        self.max_pending = max_pending
+        self.max_batch_pending = max_batch_pending if max_batch_pending is not None else max_pending
+        self.max_body = max_body
+        self.metrics = Metrics()
+        self._inflight: Dict[str, 'asyncio.Future[Dict[str, str]]'] = {}
+        self._single_pending = 0
+        self._batch_waiting = 0
+        # bounds the conversions queued by accepted batches; created on the loop
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+
+    def _admit(self) -> None:
+        if self._single_pending >= self.max_pending:
+            self.metrics.rejected += 1
+            raise HTTPError(503, 'Too many pending conversions')
+
+    async def convert(self, content: str, src: str, targets: Sequence[str], *, admit: bool = True) -> Dict[str, str]:
+        """Convert on the executor.
+
+        admit=False is used for batch files: it skips the 503 check and does not
+        count towards the max_pending limit of single conversions.
+        """
+        key = '{}:{}:{}'.format(hashlib.sha256(content.encode('utf-8')).hexdigest(), src, ','.join(targets))
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.metrics.coalesced += 1
+            return await asyncio.shield(fut)
+        if admit:
+            self._admit()
+
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(self.executor, convert_content, content, src, tuple(targets))
+        self._inflight[key] = fut
+        self.metrics.pending += 1
+        if admit:
+            self._single_pending += 1
+
+        def _done(_: Any) -> None:
+            self.metrics.pending -= 1
+            if admit:
+                self._single_pending -= 1
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+        fut.add_done_callback(_done)
+        # shield: a client disconnecting must not cancel a job others are waiting on
+        return await asyncio.shield(fut)
+
+    async def handle(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes]:
+        """Dispatch one request; returns (status, content_type, body)."""
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if method == 'GET' and url.path == '/health':
+            return 200, 'text/plain; charset=utf-8', b'ok\n'
+        if method == 'GET' and url.path == '/metrics':
+            return 200, 'text/plain; version=0.0.4; charset=utf-8', self.metrics.render().encode('utf-8')
+        if url.path not in ('/convert', '/batch'):
+            raise HTTPError(404, 'Not found')
+        if method != 'POST':
+            raise HTTPError(405, 'Method not allowed')
+
+        try:
+            text = body.decode('utf-8')
+        except UnicodeDecodeError:
+            raise HTTPError(400, 'Body must be UTF-8')
+
+        if url.path == '/convert':
+            dst = query.get('to', 'json')
+            if dst not in FORMATS:
+                raise HTTPError(400, f'Unknown target format: {dst!r}')
+            src = query.get('from') or guess_format(text)
+            if src not in FORMATS:
+                raise HTTPError(400, f'Unknown source format: {src!r}')
+            outputs = await self._convert_checked(text, src, (dst,))
+            return 200, CONTENT_TYPES[dst], outputs[dst].encode('utf-8')
+
+        targets = [t for t in query.get('to', 'json').split(',') if t]
+        for t in targets:
+            if t not in FORMATS:
+                raise HTTPError(400, f'Unknown target format: {t!r}')
+        try:
+            request = json.loads(text)
+            files = request['files']
+            if not isinstance(files, list):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            raise HTTPError(400, 'Body must be JSON with a "files" list')
+        if self._batch_waiting >= self.max_pending:
+            self.metrics.rejected += 1
+            raise HTTPError(503, 'Too many pending batch files')
+        if self._batch_slots is None:
+            self._batch_slots = asyncio.Semaphore(self.max_batch_pending)
+        results = await asyncio.gather(*(self._convert_batch_item(f, targets, self._batch_slots) for f in files))
+        return 200, CONTENT_TYPES['json'], json.dumps({'results': results}, ensure_ascii=False).encode('utf-8')
+
+    async def _convert_checked(self, text: str, src: str, targets: Sequence[str], *, admit: bool = True) -> Dict[str, str]:
+        try:
+            return await self.convert(text, src, targets, admit=admit)
+        except ValueError as e:
+            # bad uploads (invalid JSON, unknown formats) surface as ValueError
+            raise HTTPError(400, str(e))
+
+    async def _convert_batch_item(self, item: Any, targets: Sequence[str], slots: asyncio.Semaphore) -> Dict[str, Any]:
+        if not isinstance(item, dict) or not isinstance(item.get('content'), str):
+            return {'name': None, 'outputs': {}, 'error': 'each file needs a "content" string'}
+        name = item.get('name')
+        src = item.get('from') or guess_format(item['content'])
+        self._batch_waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self._batch_waiting -= 1
+        try:
+            outputs = await self._convert_checked(item['content'], src, targets, admit=False)
+        except HTTPError as e:
+            return {'name': name, 'outputs': {}, 'error': e.message}
+        except Exception as e:
+            # one bad file must not fail the whole batch
+            return {'name': name, 'outputs': {}, 'error': f'Internal error: {e}'}
+        finally:
+            slots.release()
+        return {'name': name, 'outputs': outputs, 'error': None}
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                endpoint = '-'
+                keep_alive = False
+                try:
+                    parts = request_line.decode('latin-1').split()
+                    if len(parts) != 3:
+                        raise HTTPError(400, 'Bad request line')
+                    method, target, version = parts
+                    endpoint = urlsplit(target).path
+                    headers: Dict[str, str] = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        k, _, v = line.decode('latin-1').partition(':')
+                        headers[k.strip().lower()] = v.strip()
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                    if 'transfer-encoding' in headers:
+                        # chunked bodies are not decoded; refuse rather than misread them
+                        keep_alive = False
+                        raise HTTPError(501, 'Transfer-Encoding is not supported; send a Content-Length')
+                    if method == 'POST' and 'content-length' not in headers:
+                        keep_alive = False
+                        raise HTTPError(411, 'Content-Length required')
+                    length = int(headers.get('content-length', '0') or 0)
+                    if length > self.max_body:
+                        keep_alive = False
+                        raise HTTPError(413, 'Request body too large')
+                    body = await reader.readexactly(length) if length else b''
+                    status, ctype, payload = await self.handle(method, target, body)
+                except HTTPError as e:
+                    status, ctype, payload = e.status, 'text/plain; charset=utf-8', (e.message + '\n').encode('utf-8')
+                except (ValueError, asyncio.IncompleteReadError):
+                    status, ctype, payload = 400, 'text/plain; charset=utf-8', b'Bad request\n'
+                    keep_alive = False
+                except Exception as e:
+                    status, ctype, payload = 500, 'text/plain; charset=utf-8', f'Internal error: {e}\n'.encode('utf-8')
+
+                head = (
+                    f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+                    f'Content-Type: {ctype}\r\n'
+                    f'Content-Length: {len(payload)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+                )
+                if endpoint != '/metrics':
+                    self.metrics.observe(endpoint if endpoint in _ENDPOINTS else 'other', status, time.perf_counter() - started)
+                writer.write(head.encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+_ENDPOINTS = ('/convert', '/batch', '/health')
+
+_REASONS: Dict[int, str] = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error',
+    501: 'Not Implemented', 503: 'Service Unavailable',
+}
+
+async def start_server(service: ConversionService, host: str = '127.0.0.1', port: int = 8032) -> 'asyncio.base_events.Server':
+    return await asyncio.start_server(service.serve_connection, host, port)
+
+async def _serve(host: str, port: int, workers: Optional[int], max_pending: int, max_batch_pending: Optional[int]) -> None:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        service = ConversionService(executor, max_pending=max_pending, max_batch_pending=max_batch_pending)
+        server = await start_server(service, host, port)
+        addr = server.sockets[0].getsockname()
+        print(f'Serving scene conversions on http://{addr[0]}:{addr[1]}')
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local HTTP scene conversion service.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8032)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--max-pending', type=int, default=64, help='queued conversions before answering 503')
+    parser.add_argument('--max-batch-pending', type=int, default=None, help='executor slots shared by batch files (default: --max-pending)')
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port, args.workers, args.max_pending, args.max_batch_pending))
+    except KeyboardInterrupt:
+        pass
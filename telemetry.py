@@ -0,0 +1,251 @@
+# telemetry.py - latency, memory and slow-file tracking for batch jobs
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+import heapq
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from writers import open_atomic
+
+PERCENTILES = (50, 95, 99)
+
+@dataclass
+class StageRecord:
+    """One timed unit of work; set lines inside the stage block if known."""
+    stage: str
+    file: Optional[str] = None
+    lines: Optional[int] = None
+    seconds: float = 0.0
+
+@dataclass
+class MemorySample:
+    timestamp: float
+    rss_bytes: Optional[int]
+    traced_current: Optional[int] = None
+    traced_peak: Optional[int] = None
+    top_growth: List[str] = field(default_factory=list)
+
+def count_lines(file_path: str) -> int:
+    n = 0
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            n += chunk.count(b'\n')
+    return n
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, or peak RSS where only that is available."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+class Telemetry:
+    """Opt-in telemetry for long-running batch jobs.
+
+    Tracks rolling p50/p95/p99 latency per stage over the last `window` records,
+    the `slowest` slowest records with their file and line count, and memory
+    samples taken at most every `memory_interval` seconds (RSS, plus tracemalloc
+    totals and top allocation growth when trace_memory is set). If `output` is
+    given, a report is rewritten there at every memory sample and on close():
+    Prometheus text for '*.prom' paths (e.g. for a textfile collector), JSON
+    otherwise. serve() exposes the same Prometheus text over HTTP.
+
+    Safe to share between threads.
+    """
+    def __init__(
+        self,
+        *,
+        window: int = 1024,
+        slowest: int = 10,
+        memory_interval: float = 30.0,
+        trace_memory: bool = False,
+        output: Optional[str] = None,
+    ) -> None:
+        self.window = window
+        self.slowest_n = slowest
+        self.memory_interval = memory_interval
+        self.trace_memory = trace_memory
+        self.output = output
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+        # min-heap of (seconds, seq, record) holding the slowest records
+        self._slowest: List[Tuple[float, int, StageRecord]] = []
+        self._seq = 0
+        self.memory: Deque[MemorySample] = deque(maxlen=1000)
+        self._last_sample = float('-inf')  # the first add() takes a sample
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._server: Any = None
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, file: Optional[str] = None, lines: Optional[int] = None) -> Iterator[StageRecord]:
+        """Time a block of work: with telemetry.stage('decode', path) as rec: ..."""
+        rec = StageRecord(stage=name, file=file, lines=lines)
+        start = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec.seconds = time.perf_counter() - start
+            self.add(rec)
+
+    def add(self, rec: StageRecord) -> None:
+        with self._lock:
+            durations = self._durations.get(rec.stage)
+            if durations is None:
+                durations = self._durations[rec.stage] = deque(maxlen=self.window)
+            durations.append(rec.seconds)
+            self._counts[rec.stage] = self._counts.get(rec.stage, 0) + 1
+            self._totals[rec.stage] = self._totals.get(rec.stage, 0.0) + rec.seconds
+            self._seq += 1
+            item = (rec.seconds, self._seq, rec)
+            if len(self._slowest) < self.slowest_n:
+                heapq.heappush(self._slowest, item)
+            elif self._slowest and rec.seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+            now = time.monotonic()
+            due = now - self._last_sample >= self.memory_interval
+            if due:
+                # claim the sample here so concurrent add() calls do not all take one
+                self._last_sample = now
+        if due:
+            self.sample_memory()
+
+    def percentiles(self, stage: str) -> Dict[str, float]:
+        with self._lock:
+            values = sorted(self._durations.get(stage, ()))
+        return {f'p{p}': _percentile(values, p) for p in PERCENTILES}
+
+    def slowest(self) -> List[StageRecord]:
+        with self._lock:
+            return [rec for _, _, rec in sorted(self._slowest, reverse=True)]
+
+    def sample_memory(self) -> MemorySample:
+        """Take a memory sample now (add() does this every memory_interval seconds)."""
+        with self._lock:
+            self._last_sample = time.monotonic()
+        sample = MemorySample(timestamp=time.time(), rss_bytes=rss_bytes())
+        if self.trace_memory and tracemalloc.is_tracing():
+            sample.traced_current, sample.traced_peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            with self._lock:
+                previous, self._last_snapshot = self._last_snapshot, snapshot
+            if previous is not None:
+                sample.top_growth = [str(stat) for stat in snapshot.compare_to(previous, 'lineno')[:5]]
+        with self._lock:
+            self.memory.append(sample)
+        if self.output:
+            self.write(self.output)
+        return sample
+
+    def report(self) -> Dict[str, Any]:
+        """A JSON-serializable summary of everything collected so far."""
+        with self._lock:
+            stages = list(self._durations)
+            counts = dict(self._counts)
+            totals = dict(self._totals)
+            memory = [asdict(m) for m in self.memory]
+        return {
+            'uptime_seconds': time.time() - self.started,
+            'stages': {
+                s: {'count': counts[s], 'total_seconds': totals[s], **self.percentiles(s)} for s in stages
+            },
+            'slowest': [asdict(r) for r in self.slowest()],
+            'memory': memory,
+        }
+
+    def prometheus_text(self) -> str:
+        rep = self.report()
+        out: List[str] = []
+        out.append('# TYPE scene_stage_seconds summary')
+        for stage, st in rep['stages'].items():
+            for p in PERCENTILES:
+                out.append(f'scene_stage_seconds{{stage="{stage}",quantile="{p / 100}"}} {st[f"p{p}"]:.6f}')
+            out.append(f'scene_stage_seconds_sum{{stage="{stage}"}} {st["total_seconds"]:.6f}')
+            out.append(f'scene_stage_seconds_count{{stage="{stage}"}} {st["count"]}')
+        if rep['memory']:
+            last = rep['memory'][-1]
+            if last['rss_bytes'] is not None:
+                out.append('# TYPE scene_process_rss_bytes gauge')
+                out.append(f'scene_process_rss_bytes {last["rss_bytes"]}')
+            if last['traced_current'] is not None:
+                out.append('# TYPE scene_tracemalloc_bytes gauge')
+                out.append(f'scene_tracemalloc_bytes {last["traced_current"]}')
+                out.append('# TYPE scene_tracemalloc_peak_bytes gauge')
+                out.append(f'scene_tracemalloc_peak_bytes {last["traced_peak"]}')
+        out.append('# TYPE scene_slowest_seconds gauge')
+        for rec in rep['slowest']:
+            file = (rec['file'] or '').replace('\\', '\\\\').replace('"', '\\"')
+            out.append(f'scene_slowest_seconds{{stage="{rec["stage"]}",file="{file}",lines="{rec["lines"] or ""}"}} {rec["seconds"]:.6f}')
+        return '\n'.join(out) + '\n'
+
+    def write(self, file_path: str) -> None:
+        """Atomically write a report: Prometheus text for '*.prom', JSON otherwise."""
+        with open_atomic(file_path, fsync=False) as f:
+            if file_path.endswith('.prom'):
+                f.write(self.prometheus_text())
+            else:
+                json.dump(self.report(), f, indent=2)
+
+    def serve(self, port: int = 9132, host: str = '127.0.0.1') -> int:
+        """Serve prometheus_text() at /metrics from a daemon thread; returns the port."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return int(self._server.server_address[1])
+
+    def close(self) -> None:
+        """Take a final memory sample (writing output if set), stop serve() and
+        stop tracemalloc if this instance started it."""
+        self.sample_memory()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
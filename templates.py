@@ -0,0 +1,163 @@
+# templates.py - scene templates and channel presets with copy-on-write sharing
+import copy
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from main import M32, FourBandEqualizer, InputChannel, InputChannels, MixerScene, Sends
+from writers import open_atomic
+
+class SceneTemplate:
+    """A base scene shared by many variants.
+
+    The template and any presets passed to SceneVariant.use_preset are treated
+    as immutable: variants reference them until a channel is edited. The
+    rendered .scn lines of the base channels and of presets registered with
+    preset() are cached and reused across variants; other presets are rendered
+    each time, so the cache never outgrows the template and its presets.
+    """
+    def __init__(self, base: MixerScene) -> None:
+        # private copy so later changes to the caller's scene cannot leak into variants
+        self.base = copy.deepcopy(base)
+        # id -> channel for the channels whose lines may be cached; holding the
+        # channel keeps its id from being reused
+        self._cacheable: Dict[int, InputChannel] = {id(ch): ch for ch in self.base.input_channels.channels}
+        # (1-based channel number, id(channel)) -> lines
+        self._lines: Dict[Tuple[int, int], List[str]] = {}
+
+    @classmethod
+    def load(cls, file_path: str) -> 'SceneTemplate':
+        if file_path.lower().endswith('.json'):
+            return cls(MixerScene.load_json(file_path))
+        return cls(M32.decode(file_path))
+
+    def variant(self, name: Optional[str] = None) -> 'SceneVariant':
+        return SceneVariant(self, self.base.name if name is None else name)
+
+    def preset(self, channel: InputChannel) -> InputChannel:
+        """Register a whole-channel preset; returns the private copy to pass to use_preset.
+
+        The copy lives as long as the template and its rendering is cached.
+        """
+        channel = copy.deepcopy(channel)
+        self._cacheable[id(channel)] = channel
+        return channel
+
+    def shared_lines(self, idx: int, ch: InputChannel) -> List[str]:
+        """Return the .scn lines of a shared (never edited) channel, cached when possible."""
+        if id(ch) not in self._cacheable:
+            return M32.channel_lines(idx, ch)
+        key = (idx, id(ch))
+        lines = self._lines.get(key)
+        if lines is None:
+            lines = self._lines[key] = M32.channel_lines(idx, ch)
+        return lines
+
+class SceneVariant:
+    """A scene stamped out from a SceneTemplate.
+
+    Channels are shared with the template until edited. edit_channel returns a
+    channel that is fully owned by the variant; set_channel, edit_equalizer and
+    edit_sends copy only the parts they change, so e.g. renaming a channel keeps
+    sharing its equalizer and sends. channel() returns the current object for
+    reading and must not be mutated.
+    """
+    def __init__(self, template: SceneTemplate, name: str) -> None:
+        self.template = template
+        self.name = name
+        self._channels: List[InputChannel] = list(template.base.input_channels.channels)
+        self._owned: Set[int] = set()
+        self._owned_eq: Set[int] = set()
+        self._owned_sends: Set[int] = set()
+
+    def channel(self, i: int) -> InputChannel:
+        return self._channels[i]
+
+    def _own(self, i: int) -> InputChannel:
+        # shallow copy: the equalizer and sends may still be shared
+        if i not in self._owned:
+            self._channels[i] = copy.copy(self._channels[i])
+            self._owned.add(i)
+        return self._channels[i]
+
+    def edit_channel(self, i: int) -> InputChannel:
+        """Return channel i owned by this variant, equalizer and sends included."""
+        self.edit_equalizer(i)
+        self.edit_sends(i)
+        return self._channels[i]
+
+    def edit_equalizer(self, i: int) -> FourBandEqualizer:
+        ch = self._own(i)
+        if i not in self._owned_eq:
+            ch.equalizer = copy.deepcopy(ch.equalizer)
+            self._owned_eq.add(i)
+        return ch.equalizer
+
+    def edit_sends(self, i: int) -> Sends:
+        ch = self._own(i)
+        if i not in self._owned_sends:
+            ch.bus_sends = copy.deepcopy(ch.bus_sends)
+            self._owned_sends.add(i)
+        return ch.bus_sends
+
+    def set_channel(self, i: int, **fields: Any) -> InputChannel:
+        """Set top-level InputChannel fields, e.g. set_channel(0, name='Kick', fader=-5.0).
+
+        An equalizer or bus_sends passed here is referenced like a preset (see
+        use_preset) until edited.
+        """
+        ch = self._own(i)
+        for key, value in fields.items():
+            if not hasattr(ch, key):
+                raise AttributeError(f'InputChannel has no field {key!r}')
+            setattr(ch, key, value)
+        if 'equalizer' in fields:
+            self._owned_eq.discard(i)
+        if 'bus_sends' in fields:
+            self._owned_sends.discard(i)
+        return ch
+
+    def use_preset(
+        self,
+        i: int,
+        channel: Optional[InputChannel] = None,
+        *,
+        equalizer: Optional[FourBandEqualizer] = None,
+        sends: Optional[Sends] = None,
+    ) -> None:
+        """Point channel i at shared presets instead of copying them.
+
+        A whole-channel preset replaces the channel and keeps it shareable; its
+        rendering is cached like a template channel if it was registered with
+        SceneTemplate.preset(). Equalizer and sends presets are referenced by the
+        (copied) channel until edited.
+        """
+        if channel is not None:
+            self._channels[i] = channel
+            self._owned.discard(i)
+            self._owned_eq.discard(i)
+            self._owned_sends.discard(i)
+        if equalizer is not None:
+            self._own(i).equalizer = equalizer
+            self._owned_eq.discard(i)
+        if sends is not None:
+            self._own(i).bus_sends = sends
+            self._owned_sends.discard(i)
+
+    def to_scene(self) -> MixerScene:
+        """Build an independent MixerScene; editing it changes neither the variant nor the template."""
+        return MixerScene(name=self.name, input_channels=InputChannels(channels=copy.deepcopy(self._channels)))
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yield the same lines as M32.iter_lines(self.to_scene()), reusing cached ones."""
+        yield M32.header_line(self.name)
+        for i, ch in enumerate(self._channels):
+            if i in self._owned:
+                yield from M32.channel_lines(i + 1, ch)
+            else:
+                yield from self.template.shared_lines(i + 1, ch)
+
+    def encode(self, file_path: str, *, compression: Optional[str] = None) -> None:
+        """Write this variant as an M32 .scn file (see M32.encode)."""
+        with open_atomic(file_path, compression=compression) as f:
+            for line in self.iter_lines():
+                f.write(line)
+                f.write('\n')
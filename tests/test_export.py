@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import export
+from export import export_batch, export_scene
+from main import M32, MixerScene
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp(prefix='export_', dir='.')
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+    def test_export_scene_all_formats(self):
+        scene = M32.decode('m32ExsampleFull.scn', lazy=True)
+        targets = {
+            'json': os.path.join(self.out_dir, 'a.json'),
+            'm32': os.path.join(self.out_dir, 'a.scn'),
+        }
+        export_scene(scene, targets)
+        self.assertEqual(MixerScene.load_json(targets['json']).to_dict(), scene.to_dict())
+        self.assertEqual(M32.decode(targets['m32']).name, scene.name)
+        # only the final files remain, no temp files
+        self.assertEqual(sorted(os.listdir(self.out_dir)), ['a.json', 'a.scn'])
+
+    def test_export_batch_reports_errors_per_source(self):
+        results = export_batch(['m32ExsampleFull.scn', 'missing.scn'], self.out_dir)
+        self.assertIsNone(results[0].error)
+        self.assertEqual(set(results[0].outputs), {'json', 'm32'})
+        for path in results[0].outputs.values():
+            self.assertTrue(os.path.isfile(path))
+        self.assertIsNotNone(results[1].error)
+        self.assertEqual(results[1].outputs, {})
+
+    def test_export_batch_rejects_colliding_outputs(self):
+        other = os.path.join(self.out_dir, 'src')
+        os.makedirs(other)
+        copy = os.path.join(other, 'm32ExsampleFull.scn')
+        shutil.copyfile('m32ExsampleFull.scn', copy)
+        out = os.path.join(self.out_dir, 'out')
+        results = export_batch(['m32ExsampleFull.scn', copy], out)
+        self.assertIsNone(results[0].error)
+        self.assertIn('collides', results[1].error)
+        self.assertEqual(results[1].outputs, {})
+        self.assertEqual(sorted(os.listdir(out)), ['m32ExsampleFull.json', 'm32ExsampleFull.scn'])
+
+    def test_export_batch_interleaves_decodes_and_encodes(self):
+        sources = []
+        for n in range(5):
+            path = os.path.join(self.out_dir, f's{n}.scn')
+            shutil.copyfile('m32ExsampleFull.scn', path)
+            sources.append(path)
+        calls = []
+        decode, encode = export._decode_timed, export._encode_timed
+
+        def logged_decode(*args):
+            calls.append('d')
+            return decode(*args)
+
+        def logged_encode(*args):
+            calls.append('e')
+            return encode(*args)
+
+        with mock.patch.object(export, '_decode_timed', logged_decode), mock.patch.object(export, '_encode_timed', logged_encode):
+            results = export_batch(sources, os.path.join(self.out_dir, 'out'), max_workers=1)
+        self.assertEqual([r.error for r in results], [None] * 5)
+        # with one worker a source is fully written before the next is decoded
+        self.assertEqual(''.join(calls), 'dee' * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
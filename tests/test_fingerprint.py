@@ -0,0 +1,49 @@
+import copy
+import unittest
+
+from fingerprint import SimilarityIndex, fingerprint_scene, index_files
+from main import M32
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.scene = M32.decode('m32ExsampleFull.scn')
+
+    def test_rounding_and_name_do_not_change_fingerprint(self):
+        other = copy.deepcopy(self.scene)
+        other.name = 'Copy of scene'
+        other.input_channels.channels[0].fader += 0.04
+        self.assertEqual(fingerprint_scene(other), fingerprint_scene(self.scene))
+
+        other.input_channels.channels[0].fader += 3.0
+        fp, fp_other = fingerprint_scene(self.scene), fingerprint_scene(other)
+        self.assertNotEqual(fp.digest, fp_other.digest)
+        self.assertEqual(fp.channels[1:], fp_other.channels[1:])
+
+    def test_index_clusters_near_duplicates(self):
+        near = copy.deepcopy(self.scene)
+        near.input_channels.channels[5].gain += 6.0
+        far = copy.deepcopy(self.scene)
+        for n, ch in enumerate(far.input_channels.channels):
+            ch.name = f'Other {n}'
+
+        index = SimilarityIndex()
+        index.add('a', fingerprint_scene(self.scene))
+        index.add('a-copy', fingerprint_scene(copy.deepcopy(self.scene)))
+        index.add('near', fingerprint_scene(near))
+        index.add('far', fingerprint_scene(far))
+
+        self.assertEqual(index.duplicates(), [['a', 'a-copy']])
+        self.assertEqual([sorted(g) for g in index.clusters(0.9)], [['a', 'a-copy', 'near']])
+        self.assertEqual([k for k, _ in index.query(fingerprint_scene(near))][0], 'near')
+
+    def test_index_files_skips_failures(self):
+        errors = {}
+        index = index_files(['m32ExsampleFull.scn', 'missing.scn', 'm32ExsampleFull.scn'], workers=2, errors=errors)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.duplicates(), [['m32ExsampleFull.scn', 'm32ExsampleFull.scn']])
+        self.assertEqual(list(errors), ['missing.scn'])
+
+
+if __name__ == '__main__':
+    unittest.main()
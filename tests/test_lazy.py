@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from main import M32, LazyChannelList
+
+
+class TestLazyDecode(unittest.TestCase):
+    def test_channels_parsed_on_first_access(self):
+        scene = M32.decode('m32ExsampleFull.scn', lazy=True)
+        channels = scene.input_channels.channels
+        self.assertIsInstance(channels, LazyChannelList)
+        self.assertEqual(scene.name, 'm32ExsampleFull')
+        self.assertEqual(len(channels), 32)
+        self.assertFalse(any(channels.is_loaded(i) for i in range(32)))
+
+        ch = channels[1]
+        self.assertFalse(channels.is_loaded(1))
+        ch.gain
+        self.assertTrue(channels.is_loaded(1))
+        self.assertFalse(channels.is_loaded(0))
+        self.assertIs(channels[1], ch)
+
+    def test_listing_names_parses_no_channel(self):
+        eager = M32.decode('m32ExsampleFull.scn')
+        scene = M32.decode('m32ExsampleFull.scn', lazy=True)
+        channels = scene.input_channels.channels
+        names = [ch.name for ch in channels]
+        self.assertEqual(names, [ch.name for ch in eager.input_channels.channels])
+        self.assertFalse(any(channels.is_loaded(i) for i in range(32)))
+
+    def test_names_follow_eager_decoder(self):
+        text = (
+            '#4.0# "Names" "" %000000000 1\n'
+            '/ch/01/preamp +6.8 OFF ON 24  62\n'
+            '/ch/01/config "First" 1 WH 1\n'
+            '/ch/01/config "Second" 1 WH 1\n'
+            '/ch/02/config Plain 1 RD 2\n'
+            '/ch/03/config "" 1 RD 3\n'
+        )
+        fd, path = tempfile.mkstemp(suffix='.scn', dir='.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            lazy = M32.decode(path, lazy=True).input_channels.channels
+            self.assertEqual([ch.name for ch in lazy[:4]], ['Second', 'Plain', '', ''])
+            self.assertFalse(any(lazy.is_loaded(i) for i in range(4)))
+            self.assertEqual(lazy, M32.decode_text(text).input_channels.channels)
+        finally:
+            os.remove(path)
+
+    def test_list_operations_return_channels(self):
+        eager = M32.decode('m32ExsampleFull.scn').input_channels.channels
+        channels = M32.decode('m32ExsampleFull.scn', lazy=True).input_channels.channels
+        self.assertEqual(channels + [], eager)
+        self.assertEqual(channels * 2, eager * 2)
+        self.assertEqual(sorted(channels, key=lambda ch: ch.name), sorted(eager, key=lambda ch: ch.name))
+        channels.sort(key=lambda ch: ch.fader)
+        eager.sort(key=lambda ch: ch.fader)
+        self.assertEqual(channels, eager)
+        channels.remove(eager[3])
+        eager.remove(eager[3])
+        self.assertEqual(channels, eager)
+
+    def test_renamed_channel_keeps_name_after_parse(self):
+        channels = M32.decode('m32ExsampleFull.scn', lazy=True).input_channels.channels
+        channels[0].name = 'Renamed'
+        channels.materialize()
+        self.assertEqual(channels[0].name, 'Renamed')
+        self.assertTrue(channels.is_loaded(0))
+
+    def test_lazy_matches_eager(self):
+        eager = M32.decode('m32ExsampleFull.scn')
+        lazy = M32.decode('m32ExsampleFull.scn', lazy=True)
+        self.assertEqual(lazy.input_channels.channels[5], eager.input_channels.channels[5])
+        self.assertEqual(lazy.to_dict(), eager.to_dict())
+        self.assertEqual(lazy, eager)
+
+
+if __name__ == '__main__':
+    unittest.main()
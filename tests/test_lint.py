@@ -0,0 +1,66 @@
+import unittest
+
+from lint import Rule, lint_files, lint_scene
+from main import M32
+
+
+class NamedChannels(Rule):
+    code = 'named-channel'
+    severity = 'info'
+
+    def check_channel(self, idx, ch):
+        if ch.name:
+            yield self.finding(f'channel is named {ch.name!r}', channel=idx)
+
+
+class TestLint(unittest.TestCase):
+    def test_default_rules(self):
+        scene = M32.decode('m32ExsampleFull.scn')
+        channels = scene.input_channels.channels
+        channels[0].is_muted = True
+        channels[0].bus_sends.sends[1].level = 0.0
+        channels[1].equalizer.bands[3].frequency = 25000.0
+        channels[2].low_cut_filter = True
+        channels[2].low_cut_filter_frequency = 500.0
+        channels[3].name = channels[4].name = 'Vox'
+
+        found = {(f.rule, f.channel, f.band, f.bus) for f in lint_scene(scene)}
+        self.assertIn(('unity-send-on-muted-channel', 1, None, 2), found)
+        self.assertIn(('eq-frequency-range', 2, 4, None), found)
+        self.assertIn(('low-cut-too-high', 3, None, None), found)
+        self.assertIn(('duplicate-channel-name', 5, None, None), found)
+
+    def test_custom_rule(self):
+        class NoFaderAboveUnity(Rule):
+            code = 'fader-above-unity'
+
+            def check_channel(self, idx, ch):
+                if ch.fader > 0.0:
+                    yield self.finding('fader above unity', channel=idx)
+
+        scene = M32.decode('m32ExsampleFull.scn')
+        scene.input_channels.channels[6].fader = 3.0
+        found = lint_scene(scene, rules=[NoFaderAboveUnity])
+        self.assertEqual([(f.rule, f.channel, f.scene) for f in found], [('fader-above-unity', 7, scene.name)])
+
+    def test_lint_files(self):
+        results = lint_files(['m32ExsampleFull.scn', 'M32SampleNr2.scn'], workers=1)
+        self.assertEqual(set(results), {'m32ExsampleFull.scn', 'M32SampleNr2.scn'})
+
+    def test_lint_files_reports_decode_errors(self):
+        results = lint_files(['missing.scn', 'm32ExsampleFull.scn'], workers=2)
+        self.assertEqual([(f.rule, f.severity, f.scene) for f in results['missing.scn']],
+                         [('decode-error', 'error', 'missing.scn')])
+        self.assertNotIn('decode-error', {f.rule for f in results['m32ExsampleFull.scn']})
+
+    def test_lint_files_with_custom_rules(self):
+        paths = ['m32ExsampleFull.scn', 'M32SampleNr2.scn']
+        results = lint_files(paths, [NamedChannels], workers=2)
+        for path in paths:
+            expected = [f.channel for f in lint_scene(M32.decode(path), [NamedChannels])]
+            self.assertEqual([f.channel for f in results[path]], expected)
+            self.assertEqual({f.rule for f in results[path]}, {'named-channel'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from main import M32
+from merge import MergeSpec, merge_batch, parse_channels
+
+
+class TestMerge(unittest.TestCase):
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp(prefix='merge_', dir='.')
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+    def test_parse_channels(self):
+        self.assertEqual(parse_channels('1-3, 8'), (1, 2, 3, 8))
+        with self.assertRaises(ValueError):
+            parse_channels('30-33')
+
+    def test_merge_sections_from_sources(self):
+        a = M32.decode('m32ExsampleFull.scn')
+        b = M32.decode('m32ExsampleFull.scn')
+        for n, ch in enumerate(b.input_channels.channels):
+            ch.name = f'B{n}'
+            ch.gain = -5.0
+            ch.equalizer_enabled = True
+            ch.equalizer.bands[1].frequency = 250.0
+            ch.bus_sends.sends[0].level = -12.0
+        b_path = os.path.join(self.out_dir, 'b.scn')
+        b.save_m32(b_path)
+        out = os.path.join(self.out_dir, 'merged.scn')
+        spec = MergeSpec.from_dict({
+            'output': out,
+            'base': 'm32ExsampleFull.scn',
+            'name': 'Merged',
+            'rules': [
+                {'source': b_path, 'channels': '1-4', 'sections': ['sends']},
+                {'source': b_path, 'channels': '5', 'sections': ['eq', 'name'], 'to': '10'},
+            ],
+        })
+        results = merge_batch([spec, MergeSpec(output=os.path.join(self.out_dir, 'x.scn'), base='missing.scn')])
+        self.assertIsNone(results[0].error)
+        self.assertIsNotNone(results[1].error)
+
+        merged = M32.decode(out)
+        self.assertEqual(merged.name, 'Merged')
+        ch, ach, bch = (s.input_channels.channels for s in (merged, a, b))
+        for i in range(4):
+            self.assertEqual(ch[i].bus_sends, bch[i].bus_sends)
+            self.assertEqual(ch[i].name, ach[i].name)
+            self.assertEqual(ch[i].equalizer, ach[i].equalizer)
+        self.assertEqual(ch[9].equalizer, bch[4].equalizer)
+        self.assertEqual(ch[9].equalizer_enabled, bch[4].equalizer_enabled)
+        self.assertEqual(ch[9].name, bch[4].name)
+        self.assertEqual(ch[9].gain, ach[9].gain)
+        self.assertNotEqual(ch[0].bus_sends, ach[0].bus_sends)
+        self.assertNotEqual(ch[9].equalizer, ach[9].equalizer)
+
+    def test_compressed_sources_are_decompressed(self):
+        base = os.path.join(self.out_dir, 'a.scn.gz')
+        with open('m32ExsampleFull.scn', 'rb') as f, gzip.open(base, 'wb') as g:
+            g.write(f.read())
+        b = M32.decode('m32ExsampleFull.scn')
+        b.input_channels.channels[0].name = 'From JSON'
+        b_path = os.path.join(self.out_dir, 'b.json.gz')
+        b.save_json(b_path)
+        out = os.path.join(self.out_dir, 'merged.scn')
+        spec = MergeSpec.from_dict({
+            'output': out, 'base': base,
+            'rules': [{'source': b_path, 'channels': '1', 'sections': ['name']}],
+        })
+        self.assertEqual([r.error for r in merge_batch([spec])], [None])
+        merged = M32.decode(out).input_channels.channels
+        expected = M32.decode('m32ExsampleFull.scn').input_channels.channels
+        self.assertEqual(merged[0].name, 'From JSON')
+        self.assertEqual([ch.name for ch in merged[1:]], [ch.name for ch in expected[1:]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+import socket
+import threading
+import unittest
+from unittest import mock
+
+from main import M32, MixerScene
+import server
+from server import ConversionService, start_server
+
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = ThreadPoolExecutor(max_workers=2)
+        cls.service = ConversionService(cls.executor)
+        cls.loop = asyncio.new_event_loop()
+        cls.server = cls.loop.run_until_complete(start_server(cls.service, '127.0.0.1', 0))
+        cls.port = cls.server.sockets[0].getsockname()[1]
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.server.close()
+        cls.loop.run_until_complete(cls.server.wait_closed())
+        cls.loop.close()
+        cls.executor.shutdown()
+
+    def request(self, method, path, body=None):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        try:
+            conn.request(method, path, body=body)
+            resp = conn.getresponse()
+            return resp.status, resp.read().decode('utf-8')
+        finally:
+            conn.close()
+
+    def test_convert_scn_to_json(self):
+        with open('m32ExsampleFull.scn', encoding='utf-8') as f:
+            content = f.read()
+        status, body = self.request('POST', '/convert?to=json', content.encode('utf-8'))
+        self.assertEqual(status, 200)
+        expected = M32.decode('m32ExsampleFull.scn')
+        self.assertEqual(MixerScene.from_dict(json.loads(body)).to_dict(), expected.to_dict())
+
+    def test_batch_and_metrics(self):
+        with open('m32ExsampleFull.scn', encoding='utf-8') as f:
+            content = f.read()
+        payload = {'files': [{'name': 'a', 'content': content}, {'name': 'b', 'content': '{', 'from': 'json'}]}
+        status, body = self.request('POST', '/batch?to=json,m32', json.dumps(payload).encode('utf-8'))
+        self.assertEqual(status, 200)
+        results = json.loads(body)['results']
+        self.assertEqual(set(results[0]['outputs']), {'json', 'm32'})
+        self.assertIsNone(results[0]['error'])
+        self.assertIsNotNone(results[1]['error'])
+
+        status, body = self.request('GET', '/metrics')
+        self.assertEqual(status, 200)
+        self.assertIn('scene_request_duration_seconds_count{endpoint="/batch"} 1', body)
+        self.assertIn('scene_queue_depth 0', body)
+
+    def test_non_object_json_is_rejected(self):
+        status, _ = self.request('POST', '/convert?to=m32&from=json', b'[]')
+        self.assertEqual(status, 400)
+        payload = {'files': [{'name': 'a', 'content': '[]', 'from': 'json'}, {'name': 'b', 'content': '"scene"', 'from': 'json'}]}
+        status, body = self.request('POST', '/batch?to=m32', json.dumps(payload).encode('utf-8'))
+        self.assertEqual(status, 200)
+        results = json.loads(body)['results']
+        self.assertEqual([r['name'] for r in results], ['a', 'b'])
+        self.assertTrue(all(r['error'] for r in results))
+
+    def test_chunked_upload_is_refused(self):
+        with socket.create_connection(('127.0.0.1', self.port), timeout=10) as sock:
+            sock.sendall(b'POST /convert?to=json HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n5\r\n#4.0#\r\n0\r\n\r\n')
+            reply = sock.makefile('rb').read()
+        self.assertTrue(reply.startswith(b'HTTP/1.1 501 '))
+        self.assertEqual(reply.count(b'HTTP/1.1 '), 1)
+
+    def test_batch_does_not_starve_single_requests(self):
+        release = threading.Event()
+        convert = server.convert_content
+
+        def slow_convert(content, src, targets):
+            if content.startswith('slow'):
+                release.wait(10)
+                return {t: '' for t in targets}
+            return convert(content, src, targets)
+
+        async def scenario(service):
+            files = [{'name': str(n), 'content': f'slow {n}', 'from': 'm32'} for n in range(3)]
+            batch = asyncio.ensure_future(service.handle('POST', '/batch?to=json', json.dumps({'files': files}).encode('utf-8')))
+            await asyncio.sleep(0.05)
+            try:
+                single = await service.handle('POST', '/convert?to=json', b'#4.0# "Single" "" %000000000 1\n')
+                second_batch = None
+                try:
+                    await service.handle('POST', '/batch?to=json', json.dumps({'files': files}).encode('utf-8'))
+                except server.HTTPError as e:
+                    second_batch = e.status
+            finally:
+                release.set()
+            return single[0], second_batch, (await batch)[0]
+
+        with ThreadPoolExecutor(max_workers=4) as executor, mock.patch.object(server, 'convert_content', slow_convert):
+            service = ConversionService(executor, max_pending=1)
+            self.assertEqual(asyncio.run(scenario(service)), (200, 503, 200))
+
+    def test_unknown_format_is_rejected(self):
+        status, _ = self.request('POST', '/convert?to=xml', b'#4.0#')
+        self.assertEqual(status, 400)
+
+    def test_batch_items_wait_instead_of_failing(self):
+        with open('m32ExsampleFull.scn', encoding='utf-8') as f:
+            content = f.read()
+        files = [{'name': str(n), 'content': content.replace('m32ExsampleFull', f'Scene {n}')} for n in range(4)]
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            service = ConversionService(executor, max_pending=1)
+            status, _, body = asyncio.run(service.handle('POST', '/batch?to=json', json.dumps({'files': files}).encode('utf-8')))
+        self.assertEqual(status, 200)
+        results = json.loads(body)['results']
+        self.assertEqual([r['error'] for r in results], [None] * 4)
+        self.assertEqual(service.metrics.rejected, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
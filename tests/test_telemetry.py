@@ -0,0 +1,70 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from export import export_batch
+from merge import MergeSpec, merge_batch
+from telemetry import StageRecord, Telemetry, count_lines
+
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp(prefix='telemetry_', dir='.')
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+    def test_percentiles_and_slowest(self):
+        telemetry = Telemetry(slowest=2, memory_interval=3600)
+        for n in range(1, 101):
+            telemetry.add(StageRecord('decode', f'f{n}.scn', n, n / 1000.0))
+        pct = telemetry.percentiles('decode')
+        self.assertAlmostEqual(pct['p50'], 0.0505)
+        self.assertAlmostEqual(pct['p99'], 0.09901)
+        self.assertEqual([(r.file, r.lines) for r in telemetry.slowest()], [('f100.scn', 100), ('f99.scn', 99)])
+        self.assertIn('scene_stage_seconds{stage="decode",quantile="0.95"}', telemetry.prometheus_text())
+
+    def test_export_batch_reports(self):
+        report_path = os.path.join(self.out_dir, 'report.json')
+        telemetry = Telemetry(output=report_path, trace_memory=True)
+        export_batch(['m32ExsampleFull.scn'], self.out_dir, telemetry=telemetry)
+        telemetry.close()
+
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(set(report['stages']), {'decode', 'encode.json', 'encode.m32'})
+        decode = [r for r in report['slowest'] if r['stage'] == 'decode'][0]
+        self.assertEqual(decode['lines'], count_lines('m32ExsampleFull.scn'))
+        self.assertIsNotNone(report['memory'][-1]['traced_current'])
+
+    def test_merge_load_stages_have_lines(self):
+        telemetry = Telemetry(memory_interval=3600)
+        spec = MergeSpec.from_dict({
+            'output': os.path.join(self.out_dir, 'merged.scn'),
+            'base': 'm32ExsampleFull.scn',
+            'rules': [{'source': 'M32SampleNr2.scn', 'channels': '1', 'sections': ['name']}],
+        })
+        self.assertEqual([r.error for r in merge_batch([spec], telemetry=telemetry)], [None])
+        loads = {r.file: r.lines for r in telemetry.slowest() if r.stage == 'load'}
+        self.assertEqual(loads, {p: count_lines(p) for p in ('m32ExsampleFull.scn', 'M32SampleNr2.scn')})
+
+    def test_one_memory_sample_per_interval(self):
+        telemetry = Telemetry(memory_interval=3600)
+
+        def worker():
+            for _ in range(200):
+                telemetry.add(StageRecord('decode', seconds=0.001))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(telemetry.memory), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from main import M32, EqBandType, InputChannel
+from templates import SceneTemplate
+
+
+class TestTemplates(unittest.TestCase):
+    def setUp(self):
+        self.template = SceneTemplate.load('m32ExsampleFull.scn')
+
+    def test_edits_copy_on_write(self):
+        base = self.template.base.input_channels.channels
+        variant = self.template.variant('Show 1')
+        self.assertIs(variant.channel(3), base[3])
+
+        variant.set_channel(3, name='Kick', fader=-5.0)
+        self.assertIsNot(variant.channel(3), base[3])
+        self.assertNotEqual(base[3].name, 'Kick')
+        # equalizer is still shared until it is edited
+        self.assertIs(variant.channel(3).equalizer, base[3].equalizer)
+
+        variant.edit_equalizer(3).bands[0].type = EqBandType.LOW_CUT
+        self.assertIsNot(variant.channel(3).equalizer, base[3].equalizer)
+        self.assertNotEqual(base[3].equalizer.bands[0].type, EqBandType.LOW_CUT)
+
+    def test_edit_channel_does_not_touch_template(self):
+        before = self.template.base.to_dict()
+        variant = self.template.variant('Show 1')
+        ch = variant.edit_channel(4)
+        ch.fader = -12.0
+        ch.equalizer.bands[1].gain = 6.0
+        ch.bus_sends.sends[0].level = -20.0
+        self.assertEqual(self.template.base.to_dict(), before)
+        self.assertEqual(self.template.variant('Show 2').channel(4).equalizer.bands[1].gain,
+                         self.template.base.input_channels.channels[4].equalizer.bands[1].gain)
+
+    def test_to_scene_is_independent(self):
+        from transform import Transform
+
+        before = self.template.base.to_dict()
+        variant = self.template.variant('Show 1')
+        variant.set_channel(2, name='Edited')
+        Transform().trim_gain(-3.0).offset_sends(-6.0).apply(variant.to_scene())
+        self.assertEqual(self.template.base.to_dict(), before)
+        self.assertEqual(list(variant.iter_lines()), list(M32.iter_lines(variant.to_scene())))
+
+    def test_unregistered_presets_are_not_cached(self):
+        registered = self.template.preset(InputChannel(name='Vox'))
+        for n in range(50):
+            variant = self.template.variant(f'Show {n}')
+            variant.use_preset(0, InputChannel(name=f'Guest {n}'))
+            variant.use_preset(1, registered)
+            self.assertEqual(list(variant.iter_lines()), list(M32.iter_lines(variant.to_scene())))
+        self.assertLessEqual(len(self.template._lines), 33)
+
+    def test_lines_match_full_encode(self):
+        preset = InputChannel(name='Vox', gain=12.0, fader=-3.0)
+        for n in range(3):
+            variant = self.template.variant(f'Show {n}')
+            variant.set_channel(n, name=f'Guest {n}')
+            variant.edit_sends(5).sends[2].level = -10.0
+            variant.use_preset(7, preset)
+            self.assertEqual(list(variant.iter_lines()), list(M32.iter_lines(variant.to_scene())))
+
+
+if __name__ == '__main__':
+    unittest.main()
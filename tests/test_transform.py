@@ -0,0 +1,60 @@
+import copy
+import unittest
+
+from main import M32, EqBandType
+from transform import Transform
+
+
+class TestTransform(unittest.TestCase):
+    def setUp(self):
+        self.scene = M32.decode('m32ExsampleFull.scn')
+
+    def test_lazy_and_chainable(self):
+        before = copy.deepcopy(self.scene)
+        base = Transform().trim_gain(-3.0)
+        chained = base.select(channels='1-2', buses=[1]).offset_sends(-6.0)
+        self.assertEqual(self.scene, before)
+
+        base.apply(self.scene)
+        for new, old in zip(self.scene.input_channels.channels, before.input_channels.channels):
+            self.assertAlmostEqual(new.gain, max(-12.0, old.gain - 3.0))
+            self.assertEqual(new.bus_sends, old.bus_sends)
+
+        scenes = [copy.deepcopy(before) for _ in range(3)]
+        chained.apply_all(scenes)
+        for scene in scenes:
+            ch = scene.input_channels.channels
+            old = before.input_channels.channels
+            self.assertAlmostEqual(ch[0].bus_sends.sends[0].level, old[0].bus_sends.sends[0].level - 6.0)
+            self.assertEqual(ch[0].bus_sends.sends[1], old[0].bus_sends.sends[1])
+            self.assertEqual(ch[2].bus_sends, old[2].bus_sends)
+
+    def test_band_and_low_cut_selectors(self):
+        t = (Transform()
+             .min_low_cut(80.0)
+             .select(bands='4', band_types=[EqBandType.HIGH_SHELF]).set_bands(type=EqBandType.PEQ, width=1.0))
+        t.apply(self.scene)
+        for ch in self.scene.input_channels.channels:
+            self.assertGreaterEqual(ch.low_cut_filter_frequency, 80.0)
+            self.assertEqual(ch.equalizer.bands[3].type, EqBandType.PEQ)
+            self.assertNotEqual(ch.equalizer.bands[0].width, 1.0)
+
+    def test_min_low_cut_only_raises(self):
+        channels = self.scene.input_channels.channels
+        channels[0].low_cut_filter_frequency = 500.0
+        channels[1].low_cut_filter_frequency = 40.0
+        Transform().min_low_cut(80.0).apply(self.scene)
+        self.assertEqual(channels[0].low_cut_filter_frequency, 500.0)
+        self.assertEqual(channels[1].low_cut_filter_frequency, 80.0)
+
+    def test_operations_apply_in_order(self):
+        def double_first_band(ch):
+            ch.equalizer.bands[0].gain *= 2
+
+        Transform().set_bands(gain=2.0).map_channels(double_first_band).apply(self.scene)
+        for ch in self.scene.input_channels.channels:
+            self.assertEqual(ch.equalizer.bands[0].gain, 4.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
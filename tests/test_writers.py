@@ -0,0 +1,44 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from main import M32, MixerScene
+from writers import open_atomic
+
+
+class TestWriters(unittest.TestCase):
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp(prefix='writers_', dir='.')
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+    def test_failed_write_keeps_existing_file(self):
+        path = os.path.join(self.out_dir, 'scene.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('old')
+        with self.assertRaises(RuntimeError):
+            with open_atomic(path) as f:
+                f.write('partial')
+                raise RuntimeError('boom')
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'old')
+        self.assertEqual(os.listdir(self.out_dir), ['scene.json'])
+
+    def test_gzip_inferred_from_extension(self):
+        scene = M32.decode('m32ExsampleFull.scn')
+        json_path = os.path.join(self.out_dir, 'scene.json.gz')
+        scn_path = os.path.join(self.out_dir, 'scene.scn.gz')
+        scene.save_json(json_path)
+        scene.save_m32(scn_path)
+        with gzip.open(json_path, 'rt', encoding='utf-8') as f:
+            self.assertEqual(MixerScene.from_dict(json.load(f)).to_dict(), scene.to_dict())
+        with gzip.open(scn_path, 'rt', encoding='utf-8') as f:
+            self.assertEqual(f.read().splitlines(), list(M32.iter_lines(scene)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+# transform.py - chainable bulk edits over channels, EQ bands and sends
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from main import EqBandType, EqualizerBand, InputChannel, MixerScene, Send
+from merge import parse_channels
+
+# console limits used when clamping edited values
+GAIN_RANGE = (-12.0, 60.0)
+LEVEL_RANGE = (-90.0, 10.0)
+LOW_CUT_RANGE = (20.0, 400.0)
+
+def _clamp(value: float, limits: Tuple[float, float]) -> float:
+    return max(limits[0], min(limits[1], value))
+
+@dataclass(frozen=True)
+class Selector:
+    """Which channels, EQ bands and buses an operation touches (1-based; None = all)."""
+    channels: Optional[FrozenSet[int]] = None
+    bands: Optional[FrozenSet[int]] = None
+    buses: Optional[FrozenSet[int]] = None
+    band_types: Optional[FrozenSet[EqBandType]] = None
+
+# (kind, selector, fn) with kind 'channel', 'band' or 'send'
+_Op = Tuple[str, Selector, Callable[[Any], None]]
+
+class Transform:
+    """A chainable, lazily evaluated set of edits.
+
+    Every method returns a new Transform; nothing is touched until apply() or
+    apply_all(). select() scopes the operations that follow it:
+
+        t = (Transform()
+             .trim_gain(-3.0)
+             .min_low_cut(80.0)
+             .select(channels='1-8', buses='1-4').offset_sends(-6.0)
+             .select(band_types=[EqBandType.PEQ]).set_bands(width=1.5))
+        t.apply_all(scenes)
+    """
+    def __init__(self, ops: Tuple[_Op, ...] = (), selector: Selector = Selector()) -> None:
+        self._ops = ops
+        self._selector = selector
+        self._plans: Dict[Tuple[int, int, int], Any] = {}
+
+    def _with(self, kind: str, fn: Callable[[Any], None]) -> 'Transform':
+        return Transform(self._ops + ((kind, self._selector, fn),), self._selector)
+
+    def select(
+        self,
+        channels: Any = None,
+        *,
+        bands: Any = None,
+        buses: Any = None,
+        band_types: Optional[Iterable[EqBandType]] = None,
+    ) -> 'Transform':
+        """Scope the following operations; channels/bands/buses accept '1-8,12' or lists."""
+        selector = Selector(
+            channels=frozenset(parse_channels(channels, 32)) if channels is not None else None,
+            bands=frozenset(parse_channels(bands, 4)) if bands is not None else None,
+            buses=frozenset(parse_channels(buses, 16)) if buses is not None else None,
+            band_types=frozenset(band_types) if band_types is not None else None,
+        )
+        return Transform(self._ops, selector)
+
+    def select_all(self) -> 'Transform':
+        return Transform(self._ops, Selector())
+
+    # channel operations
+
+    def map_channels(self, fn: Callable[[InputChannel], None]) -> 'Transform':
+        return self._with('channel', fn)
+
+    def trim_gain(self, db: float) -> 'Transform':
+        def op(ch: InputChannel) -> None:
+            ch.gain = _clamp(ch.gain + db, GAIN_RANGE)
+        return self._with('channel', op)
+
+    def offset_fader(self, db: float) -> 'Transform':
+        def op(ch: InputChannel) -> None:
+            # -oo stays -oo
+            if ch.fader > LEVEL_RANGE[0]:
+                ch.fader = _clamp(ch.fader + db, LEVEL_RANGE)
+        return self._with('channel', op)
+
+    def min_low_cut(self, hz: float, *, enable: bool = False) -> 'Transform':
+        """Raise low-cut frequencies below hz to hz; enable=True also switches the filter on.
+
+        hz is clamped to LOW_CUT_RANGE; frequencies already above it are left alone.
+        """
+        target = _clamp(hz, LOW_CUT_RANGE)
+
+        def op(ch: InputChannel) -> None:
+            if ch.low_cut_filter_frequency < target:
+                ch.low_cut_filter_frequency = target
+            if enable:
+                ch.low_cut_filter = True
+        return self._with('channel', op)
+
+    # band operations
+
+    def map_bands(self, fn: Callable[[EqualizerBand], None]) -> 'Transform':
+        return self._with('band', fn)
+
+    def set_bands(
+        self,
+        *,
+        type: Optional[EqBandType] = None,
+        frequency: Optional[float] = None,
+        gain: Optional[float] = None,
+        width: Optional[float] = None,
+    ) -> 'Transform':
+        """Set the given fields on every selected band, e.g. to apply a band profile."""
+        def op(band: EqualizerBand) -> None:
+            if type is not None:
+                band.type = type
+            if frequency is not None:
+                band.frequency = frequency
+            if gain is not None:
+                band.gain = gain
+            if width is not None:
+                band.width = width
+        return self._with('band', op)
+
+    # send operations
+
+    def map_sends(self, fn: Callable[[Send], None]) -> 'Transform':
+        return self._with('send', fn)
+
+    def offset_sends(self, db: float) -> 'Transform':
+        def op(send: Send) -> None:
+            if send.level > LEVEL_RANGE[0]:
+                send.level = _clamp(send.level + db, LEVEL_RANGE)
+        return self._with('send', op)
+
+    # evaluation
+
+    def _plan(self, n_channels: int, n_bands: int, n_sends: int) -> Any:
+        """Resolve selectors once into per-channel step lists, shared by every scene.
+
+        A step is (kind, positions, band_types, fn); steps keep the order in which
+        the operations were added.
+        """
+        key = (n_channels, n_bands, n_sends)
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+        plan = []
+        for idx in range(1, n_channels + 1):
+            steps: List[Tuple[str, Tuple[int, ...], Optional[FrozenSet[EqBandType]], Callable[[Any], None]]] = []
+            for kind, sel, fn in self._ops:
+                if sel.channels is not None and idx not in sel.channels:
+                    continue
+                if kind == 'channel':
+                    steps.append((kind, (), None, fn))
+                elif kind == 'band':
+                    bands = tuple(b for b in range(n_bands) if sel.bands is None or b + 1 in sel.bands)
+                    if bands:
+                        steps.append((kind, bands, sel.band_types, fn))
+                else:
+                    sends = tuple(s for s in range(n_sends) if sel.buses is None or s + 1 in sel.buses)
+                    if sends:
+                        steps.append((kind, sends, None, fn))
+            plan.append(steps)
+        self._plans[key] = plan
+        return plan
+
+    def apply(self, scene: MixerScene) -> MixerScene:
+        """Apply every operation, in the order added, to the scene in place and return it."""
+        channels = scene.input_channels.channels
+        if not channels:
+            return scene
+        first = channels[0]
+        plan = self._plan(len(channels), len(first.equalizer.bands), len(first.bus_sends.sends))
+        for ch, steps in zip(channels, plan):
+            for kind, positions, types, fn in steps:
+                if kind == 'channel':
+                    fn(ch)
+                elif kind == 'band':
+                    bands = ch.equalizer.bands
+                    for b in positions:
+                        band = bands[b]
+                        if types is None or band.type in types:
+                            fn(band)
+                else:
+                    sends = ch.bus_sends.sends
+                    for s in positions:
+                        fn(sends[s])
+        return scene
+
+    def apply_all(self, scenes: Iterable[MixerScene]) -> List[MixerScene]:
+        return [self.apply(scene) for scene in scenes]
@@ -0,0 +1,122 @@
+# writers.py - buffered, atomic and optionally compressed output files (and reading them back)
+from contextlib import contextmanager
+import io
+import os
+import uuid
+from typing import BinaryIO, Dict, Iterator, Optional, TextIO
+
+# file extension -> compression name, used when compression is not given
+COMPRESSION_EXTENSIONS: Dict[str, str] = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.zst': 'zstd',
+}
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+def compression_for(file_path: str) -> str:
+    """Return the compression implied by the file extension ('none' if plain)."""
+    _, ext = os.path.splitext(file_path)
+    return COMPRESSION_EXTENSIONS.get(ext.lower(), 'none')
+
+def _compressed_stream(raw: BinaryIO, compression: str) -> BinaryIO:
+    if compression == 'none':
+        return raw
+    if compression == 'gzip':
+        import gzip
+        # fixed mtime so identical scenes produce identical archives
+        return gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0)  # type: ignore[return-value]
+    if compression == 'bz2':
+        import bz2
+        return bz2.BZ2File(raw, 'wb')  # type: ignore[return-value]
+    if compression == 'xz':
+        import lzma
+        return lzma.LZMAFile(raw, 'wb')  # type: ignore[return-value]
+    if compression == 'zstd':
+        try:
+            from compression import zstd  # type: ignore[import-not-found]
+        except ImportError:
+            raise ValueError('zstd compression requires Python 3.14 or newer')
+        return zstd.ZstdFile(raw, 'wb')  # type: ignore[no-any-return]
+    raise ValueError(f'Unknown compression: {compression!r}')
+
+def read_bytes(file_path: str, *, compression: Optional[str] = None) -> bytes:
+    """Read a whole file, decompressing it as open_atomic would have compressed it.
+
+    compression is as for open_atomic; when None it is inferred from the extension.
+    """
+    if compression is None:
+        compression = compression_for(file_path)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if compression == 'none':
+        return data
+    if compression == 'gzip':
+        import gzip
+        return gzip.decompress(data)
+    if compression == 'bz2':
+        import bz2
+        return bz2.decompress(data)
+    if compression == 'xz':
+        import lzma
+        return lzma.decompress(data)
+    if compression == 'zstd':
+        try:
+            from compression import zstd  # type: ignore[import-not-found]
+        except ImportError:
+            raise ValueError('zstd compression requires Python 3.14 or newer')
+        return zstd.decompress(data)  # type: ignore[no-any-return]
+    raise ValueError(f'Unknown compression: {compression!r}')
+
+def _temp_path(file_path: str) -> str:
+    directory, base = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, f'.{base}.{uuid.uuid4().hex[:12]}.tmp')
+
+@contextmanager
+def open_atomic(
+    file_path: str,
+    *,
+    compression: Optional[str] = None,
+    encoding: str = 'utf-8',
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    fsync: bool = True,
+) -> Iterator[TextIO]:
+    """Open a text stream that replaces file_path only once it is complete.
+
+    Writes go through a buffer of buffer_size bytes into a temp file in the same
+    directory, optionally through a gzip/bz2/xz/zstd compressor. On a clean exit
+    the temp file is flushed, fsynced and renamed over file_path; on an error
+    it is removed and file_path is left untouched.
+
+    compression is one of 'none', 'gzip', 'bz2', 'xz' or 'zstd'; when None it
+    is inferred from the extension of file_path.
+    """
+    if compression is None:
+        compression = compression_for(file_path)
+    tmp_path = _temp_path(file_path)
+    raw = open(tmp_path, 'wb', buffering=buffer_size)
+    try:
+        stream = _compressed_stream(raw, compression)
+        text = io.TextIOWrapper(stream, encoding=encoding)  # type: ignore[arg-type]
+        try:
+            yield text
+            text.flush()
+        finally:
+            # detach so closing the wrapper does not close raw before fsync
+            if stream is raw:
+                text.detach()
+            else:
+                text.close()
+        raw.flush()
+        if fsync:
+            os.fsync(raw.fileno())
+        raw.close()
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        raw.close()
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise